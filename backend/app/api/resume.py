@@ -1,18 +1,29 @@
-from fastapi import APIRouter, UploadFile, Depends, HTTPException
+import asyncio
+import json
+import time
+from typing import Any
+
+from fastapi import APIRouter, UploadFile, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.parse import parse
-from app.tailor import tailor_resume_with_rag
+from app.parse import aparse
+from app.tailor import (
+    TAILOR_BATCH_MAX_JOBS,
+    atailor_resume_with_rag,
+    stream_tailor_jobs_with_rag,
+    stream_tailor_resume_with_rag,
+)
 from app.latex_resume import render_resume_pdf
 from app.models import Job, Resume, KnowledgeDocumentIn
 from app.database import get_db
 from app.dependencies import get_current_user_optional, get_current_user
 from app.db.models import User
+from app.ingest_queue import enqueue_knowledge_ingestion, get_knowledge_ingest_job
 from app.rag import (
-    ingest_user_knowledge,
     list_user_knowledge_documents,
     get_user_knowledge_document,
+    update_user_knowledge_document,
     delete_user_knowledge_document,
     KnowledgeStoreUnavailableError,
 )
@@ -22,15 +33,15 @@ router = APIRouter(prefix="/resume", tags=["Resume"])
 
 
 @router.post("/upload")
-async def uploadResume(file: UploadFile):
-    """Upload a PDF resume and return the parsed structured Resume."""
+async def uploadResume(file: UploadFile, cache: bool = Query(True)):
+    """Upload a PDF resume and return the parsed structured Resume; cache=false parses it again."""
     if not file.filename.endswith(".pdf"):
         return JSONResponse(
             status_code=400, content={"message": "Requires .pdf ending"}
         )
 
     contents = await file.read()
-    resume = parse(contents)
+    resume = await aparse(contents, use_cache=cache)
     await file.close()
 
     return JSONResponse(status_code=200, content=resume.model_dump())
@@ -40,29 +51,150 @@ async def uploadResume(file: UploadFile):
 async def tailorResume(
     resume: Resume,
     job: Job,
+    combined: bool | None = Query(None),
+    cache: bool = Query(True),
     db: Session = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ):
-    """Generate tailoring suggestions for a resume given a job."""
+    """Generate tailoring suggestions for a resume given a job; combined=true uses one model call,
+    cache=false recomputes instead of returning a cached result."""
     if not (job.description or "").strip():
         raise HTTPException(status_code=400, detail="job description is required")
     user_id = current_user.id if current_user else None
-    suggestions = tailor_resume_with_rag(resume=resume, job=job, db=db, user_id=user_id)
+    suggestions = await atailor_resume_with_rag(
+        resume=resume, job=job, db=db, user_id=user_id, combined=combined, use_cache=cache
+    )
     return JSONResponse(
         status_code=200, content=[s.model_dump() for s in suggestions]
     )
 
 
-@router.post("/knowledge")
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/tailor/stream")
+async def tailorResumeStream(
+    resume: Resume,
+    job: Job,
+    cache: bool = Query(True),
+    db: Session = Depends(get_db),
+    current_user: User | None = Depends(get_current_user_optional),
+):
+    """Server-sent events: one `section` event per tailored section as it finishes, then a `summary`."""
+    if not (job.description or "").strip():
+        raise HTTPException(status_code=400, detail="job description is required")
+    user_id = current_user.id if current_user else None
+    prompt_usage: dict[str, Any] = {}
+    sections = await stream_tailor_resume_with_rag(
+        resume=resume, job=job, db=db, user_id=user_id, use_cache=cache, usage=prompt_usage
+    )
+
+    async def events():
+        started = time.perf_counter()
+        counts: dict[str, int] = {}
+        timed_out: list[str] = []
+        try:
+            async for section, suggestions in sections:
+                if suggestions is None:
+                    timed_out.append(section)
+                counts[section] = len(suggestions or [])
+                yield _sse(
+                    "section",
+                    {
+                        "section": section,
+                        "suggestions": [s.model_dump() for s in suggestions or []],
+                        "timedOut": suggestions is None,
+                    },
+                )
+        except Exception:
+            yield _sse("error", {"detail": "tailoring failed"})
+            return
+        yield _sse(
+            "summary",
+            {
+                "sections": counts,
+                "timedOut": timed_out,
+                "suggestionCount": sum(counts.values()),
+                "elapsedMs": round((time.perf_counter() - started) * 1000),
+                "promptTokens": prompt_usage,
+            },
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/tailor/batch")
+async def tailorResumeBatch(
+    resume: Resume,
+    jobs: list[Job],
+    combined: bool | None = Query(None),
+    cache: bool = Query(True),
+    db: Session = Depends(get_db),
+    current_user: User | None = Depends(get_current_user_optional),
+):
+    """Server-sent events: one `job` event per job as its suggestions are ready, then a `summary`."""
+    if not jobs:
+        raise HTTPException(status_code=400, detail="at least one job is required")
+    if len(jobs) > TAILOR_BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"at most {TAILOR_BATCH_MAX_JOBS} jobs per batch")
+    missing = [i for i, job in enumerate(jobs) if not (job.description or "").strip()]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"job description is required (jobs {missing})")
+    user_id = current_user.id if current_user else None
+    results = await stream_tailor_jobs_with_rag(
+        resume=resume, jobs=jobs, db=db, user_id=user_id, combined=combined, use_cache=cache
+    )
+
+    async def events():
+        started = time.perf_counter()
+        failed: list[int] = []
+        total = 0
+        async for index, suggestions in results:
+            if suggestions is None:
+                failed.append(index)
+            total += len(suggestions or [])
+            yield _sse(
+                "job",
+                {
+                    "index": index,
+                    "jobId": jobs[index].id,
+                    "suggestions": [s.model_dump() for s in suggestions or []],
+                    "failed": suggestions is None,
+                },
+            )
+        yield _sse(
+            "summary",
+            {
+                "jobs": len(jobs),
+                "failed": sorted(failed),
+                "suggestionCount": total,
+                "elapsedMs": round((time.perf_counter() - started) * 1000),
+            },
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/knowledge", status_code=202)
 async def create_knowledge_doc(
     body: KnowledgeDocumentIn,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """Queue a context entry for ingestion; poll /knowledge/jobs/{jobId} for progress."""
     if not body.content.strip():
         raise HTTPException(status_code=400, detail="content is required")
     try:
-        doc, chunk_count = ingest_user_knowledge(
+        return enqueue_knowledge_ingestion(
             db=db,
             user_id=current_user.id,
             title=body.title,
@@ -71,21 +203,37 @@ async def create_knowledge_doc(
         )
     except KnowledgeStoreUnavailableError as exc:
         raise HTTPException(status_code=503, detail="knowledge storage is unavailable") from exc
-    return {
-        "id": str(doc.id),
-        "title": doc.title,
-        "sourceType": doc.source_type,
-        "chunkCount": chunk_count,
-    }
+
+
+@router.get("/knowledge/jobs/{job_id}")
+async def get_knowledge_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        job = get_knowledge_ingest_job(db=db, user_id=current_user.id, job_id=job_id)
+    except KnowledgeStoreUnavailableError as exc:
+        raise HTTPException(status_code=503, detail="knowledge storage is unavailable") from exc
+    if job is None:
+        raise HTTPException(status_code=404, detail="ingestion job not found")
+    return job
 
 
 @router.get("/knowledge")
 async def get_knowledge_docs(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    """One page of saved context entries, newest first; follow nextCursor for more."""
     try:
-        return list_user_knowledge_documents(db=db, user_id=current_user.id)
+        return list_user_knowledge_documents(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="invalid cursor") from exc
     except KnowledgeStoreUnavailableError as exc:
         raise HTTPException(status_code=503, detail="knowledge storage is unavailable") from exc
 
@@ -93,11 +241,21 @@ async def get_knowledge_docs(
 @router.get("/knowledge/{doc_id}")
 async def get_knowledge_doc(
     doc_id: str,
+    include_content: bool = Query(True, alias="includeContent"),
+    content_offset: int = Query(0, ge=0, alias="contentOffset"),
+    content_limit: int | None = Query(None, ge=0, alias="contentLimit"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        doc = get_user_knowledge_document(db=db, user_id=current_user.id, doc_id=doc_id)
+        doc = get_user_knowledge_document(
+            db=db,
+            user_id=current_user.id,
+            doc_id=doc_id,
+            include_content=include_content,
+            content_offset=content_offset,
+            content_limit=content_limit,
+        )
     except KnowledgeStoreUnavailableError as exc:
         raise HTTPException(status_code=503, detail="knowledge storage is unavailable") from exc
     if doc is None:
@@ -105,6 +263,39 @@ async def get_knowledge_doc(
     return doc
 
 
+@router.put("/knowledge/{doc_id}")
+async def update_knowledge_doc(
+    doc_id: str,
+    body: KnowledgeDocumentIn,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    if not body.content.strip():
+        raise HTTPException(status_code=400, detail="content is required")
+    try:
+        # Re-embedding changed chunks blocks, so keep it off the event loop.
+        updated = await asyncio.to_thread(
+            update_user_knowledge_document,
+            db=db,
+            user_id=current_user.id,
+            doc_id=doc_id,
+            title=body.title,
+            content=body.content,
+            source_type=body.sourceType or "note",
+        )
+    except KnowledgeStoreUnavailableError as exc:
+        raise HTTPException(status_code=503, detail="knowledge storage is unavailable") from exc
+    if updated is None:
+        raise HTTPException(status_code=404, detail="knowledge document not found")
+    doc, counts = updated
+    return {
+        "id": str(doc.id),
+        "title": doc.title,
+        "sourceType": doc.source_type,
+        **counts,
+    }
+
+
 @router.delete("/knowledge/{doc_id}")
 async def delete_knowledge_doc(
     doc_id: str,
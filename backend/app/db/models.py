@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, Integer, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint, Integer, Text, LargeBinary, Float
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -12,6 +12,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     default_resume = Column(JSONB, nullable=True)  # stored parsed resume JSON
+    knowledge_version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped on every knowledge change
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -46,8 +47,65 @@ class UserKnowledgeChunk(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     chunk_index = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
+    text_hash = Column(String(64), nullable=True)  # sha256 hex of text, used to reuse chunks on edit.
     metadata_json = Column(JSONB, nullable=True)
-    embedding = Column(JSONB, nullable=True)  # List[float] stored as JSON.
+    embedding = Column(JSONB, nullable=True)  # Legacy List[float]; init_db moves it to embedding_vec.
+    embedding_vec = Column(LargeBinary, nullable=True)  # Packed little-endian floats, see embedding_dtype.
+    embedding_dim = Column(Integer, nullable=True)
+    embedding_dtype = Column(String(8), nullable=True)  # "float32" or "float16"
+    embedding_model = Column(String(128), nullable=True)  # Model name, or "fallback".
+    embedding_q8 = Column(LargeBinary, nullable=True)  # int8 codes of the normalized vector, for first-pass scoring.
+    embedding_scale = Column(Float, nullable=True)  # embedding_q8 * embedding_scale ~= normalized vector
+    minhash = Column(LargeBinary, nullable=True)  # uint32 MinHash signature of text, see app.minhash.
+    duplicate_of_id = Column(UUID(as_uuid=True), ForeignKey("user_knowledge_chunks.id", ondelete="SET NULL"), nullable=True, index=True)  # Near-duplicate of this chunk; shares its embedding.
+    token_count = Column(Integer, nullable=True)  # BM25 document length; NULL until indexed.
+    term_postings = Column(LargeBinary, nullable=True)  # Packed (term id, tf) pairs, see app.lexical.pack_postings.
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (UniqueConstraint("document_id", "chunk_index", name="uq_document_chunk_idx"),)
+
+
+class KnowledgeIngestJob(Base):
+    __tablename__ = "knowledge_ingest_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("user_knowledge_documents.id", ondelete="SET NULL"), nullable=True)
+    title = Column(String(256), nullable=False)
+    status = Column(String(16), nullable=False, default="queued")  # queued | running | completed | failed
+    chunks_total = Column(Integer, nullable=False, default=0)
+    chunks_embedded = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+
+    model_name = Column(String(128), primary_key=True)
+    task = Column(String(16), primary_key=True)  # "query" or "document"; models embed them differently.
+    text_hash = Column(String(64), primary_key=True)  # sha256 hex of the embedded text.
+    embedding_vec = Column(LargeBinary, nullable=False)  # Packed little-endian floats, see embedding_dtype.
+    embedding_dim = Column(Integer, nullable=False)
+    embedding_dtype = Column(String(8), nullable=False)  # "float32"
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class TailorCacheEntry(Base):
+    __tablename__ = "tailor_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 hex, see app.tailor_cache.cache_key.
+    suggestions = Column(JSONB, nullable=False)  # List of Suggestion dicts.
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class ParseCacheEntry(Base):
+    __tablename__ = "parse_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 hex, see app.parse_cache.cache_key.
+    resume = Column(JSONB, nullable=False)  # Resume.model_dump() of the parsed PDF.
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
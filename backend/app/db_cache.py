@@ -0,0 +1,116 @@
+# Shared logic of the persistent result caches (tailor_cache, parse_cache): a
+# table keyed by a sha256 hex cache_key with one JSONB value column plus
+# created_at and last_used_at. Entries optionally expire after ttl_seconds and
+# the table is trimmed to max_rows least recently used entries every
+# evict_every writes. Each call uses its own session, and DB errors are just
+# misses.
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import SessionLocal
+
+
+class DbCache:
+    """get/put/evict over one cache table."""
+
+    def __init__(
+        self,
+        model: type,
+        value_column: str,
+        max_rows: int,
+        evict_every: int,
+        ttl_seconds: int | None = None,
+    ):
+        self.model = model
+        self.value_column = value_column
+        self.max_rows = max_rows
+        self.evict_every = max(1, evict_every)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+    def _expiry_cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+
+    def get(self, key: str) -> Any:
+        """The cached value for key, or None when missing or expired."""
+        db = SessionLocal()
+        try:
+            query = db.query(self.model).filter(self.model.cache_key == key)
+            if self.ttl_seconds is not None:
+                query = query.filter(self.model.created_at >= self._expiry_cutoff())
+            entry = query.first()
+            if entry is None:
+                return None
+            entry.last_used_at = func.now()
+            value = getattr(entry, self.value_column)
+            db.commit()
+            return value
+        except SQLAlchemyError:
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def put(self, key: str, value: Any) -> None:
+        db = SessionLocal()
+        try:
+            stmt = insert(self.model).values(cache_key=key, **{self.value_column: value})
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[self.model.cache_key],
+                    set_={
+                        self.value_column: getattr(stmt.excluded, self.value_column),
+                        "created_at": func.now(),
+                        "last_used_at": func.now(),
+                    },
+                )
+            )
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self._writes_since_evict += 1
+            due = self._writes_since_evict >= self.evict_every
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self, max_rows: int | None = None) -> int:
+        """Delete expired entries, then least recently used ones beyond max_rows."""
+        max_rows = self.max_rows if max_rows is None else max_rows
+        db = SessionLocal()
+        try:
+            removed = 0
+            if self.ttl_seconds is not None:
+                removed = (
+                    db.query(self.model)
+                    .filter(self.model.created_at < self._expiry_cutoff())
+                    .delete(synchronize_session=False)
+                )
+            excess = db.query(func.count()).select_from(self.model).scalar() - max_rows
+            if excess > 0:
+                oldest = db.query(self.model.cache_key).order_by(self.model.last_used_at).limit(excess)
+                removed += (
+                    db.query(self.model)
+                    .filter(self.model.cache_key.in_(oldest.subquery().select()))
+                    .delete(synchronize_session=False)
+                )
+            db.commit()
+            return removed
+        except SQLAlchemyError:
+            db.rollback()
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,213 @@
+# Content-addressed cache of embedding vectors, keyed by (embedding model name,
+# task, sha256 of the text). Lookups try an in-process LRU, then the
+# embedding_cache table. The table uses its own short-lived sessions, so cache
+# traffic never joins the caller's transaction and DB errors are just misses.
+# Vectors are float32 arrays in memory and packed little-endian bytes in the
+# table, in the same format as user_knowledge_chunks.embedding_vec.
+
+import hashlib
+import os
+import threading
+from typing import Sequence
+
+import numpy as np
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.cache import LRUCache
+from app.database import SessionLocal
+from app.db.models import EmbeddingCacheEntry
+
+MEMORY_SIZE = int(os.environ.get("EMBEDDING_CACHE_MEMORY_SIZE", "4096"))
+MAX_ROWS = int(os.environ.get("EMBEDDING_CACHE_MAX_ROWS", "200000"))
+# Eviction needs a COUNT over the table, so only run it every N inserted rows.
+EVICT_EVERY = int(os.environ.get("EMBEDDING_CACHE_EVICT_EVERY", "1000"))
+
+# Storage formats of packed embeddings, by the name recorded next to them.
+EMBEDDING_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+_memory = LRUCache(maxsize=MEMORY_SIZE)
+_lock = threading.Lock()
+_counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "writes": 0}
+_writes_since_evict = 0
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def pack_embedding(values: Sequence[float] | np.ndarray, dtype: str = "float32") -> bytes:
+    return np.asarray(values, dtype=EMBEDDING_DTYPES[dtype]).tobytes()
+
+
+def unpack_embedding(blob: bytes, dtype: str | None) -> np.ndarray:
+    """View a packed embedding as a NumPy array without copying."""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPES.get(dtype or "float32", EMBEDDING_DTYPES["float32"]))
+
+
+def _as_vector(values: Sequence[float] | np.ndarray) -> np.ndarray:
+    """A read-only float32 copy, safe to hand to every caller."""
+    vec = np.array(values, dtype=np.float32)
+    vec.flags.writeable = False
+    return vec
+
+
+def _count(name: str, n: int = 1) -> None:
+    if n:
+        with _lock:
+            _counters[name] += n
+
+
+def stats() -> dict[str, int]:
+    """Hit/miss counters since process start (or the last reset_stats)."""
+    with _lock:
+        out = dict(_counters)
+    out["memory_entries"] = len(_memory)
+    return out
+
+
+def reset_stats() -> None:
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
+
+
+def clear_memory() -> None:
+    _memory.clear()
+
+
+def _load_from_db(model_name: str, task: str, hashes: list[str]) -> dict[str, np.ndarray]:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                EmbeddingCacheEntry.text_hash,
+                EmbeddingCacheEntry.embedding_vec,
+                EmbeddingCacheEntry.embedding_dtype,
+            )
+            .filter(
+                EmbeddingCacheEntry.model_name == model_name,
+                EmbeddingCacheEntry.task == task,
+                EmbeddingCacheEntry.text_hash.in_(hashes),
+            )
+            .all()
+        )
+        found = {h: _as_vector(unpack_embedding(blob, dtype)) for h, blob, dtype in rows if blob}
+        if found:
+            db.query(EmbeddingCacheEntry).filter(
+                EmbeddingCacheEntry.model_name == model_name,
+                EmbeddingCacheEntry.task == task,
+                EmbeddingCacheEntry.text_hash.in_(list(found)),
+            ).update({EmbeddingCacheEntry.last_used_at: func.now()}, synchronize_session=False)
+            db.commit()
+        return found
+    except SQLAlchemyError:
+        db.rollback()
+        return {}
+    finally:
+        db.close()
+
+
+def _store_in_db(model_name: str, task: str, vectors: dict[str, np.ndarray]) -> None:
+    db = SessionLocal()
+    try:
+        stmt = insert(EmbeddingCacheEntry).values(
+            [
+                {
+                    "model_name": model_name,
+                    "task": task,
+                    "text_hash": h,
+                    "embedding_vec": pack_embedding(vec),
+                    "embedding_dim": len(vec),
+                    "embedding_dtype": "float32",
+                }
+                for h, vec in vectors.items()
+            ]
+        )
+        db.execute(stmt.on_conflict_do_nothing())
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+    finally:
+        db.close()
+
+
+def evict(max_rows: int = MAX_ROWS) -> int:
+    """Delete least recently used rows beyond max_rows; returns rows removed."""
+    db = SessionLocal()
+    try:
+        excess = db.query(func.count()).select_from(EmbeddingCacheEntry).scalar() - max_rows
+        if excess <= 0:
+            return 0
+        oldest = (
+            db.query(
+                EmbeddingCacheEntry.model_name,
+                EmbeddingCacheEntry.task,
+                EmbeddingCacheEntry.text_hash,
+            )
+            .order_by(EmbeddingCacheEntry.last_used_at)
+            .limit(excess)
+        )
+        removed = (
+            db.query(EmbeddingCacheEntry)
+            .filter(
+                tuple_(
+                    EmbeddingCacheEntry.model_name,
+                    EmbeddingCacheEntry.task,
+                    EmbeddingCacheEntry.text_hash,
+                ).in_(oldest.subquery().select())
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return removed
+    except SQLAlchemyError:
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+
+def get_many(model_name: str, task: str, hashes: list[str]) -> dict[str, np.ndarray]:
+    """Return cached float32 vectors for whichever of the given text hashes are known."""
+    found: dict[str, np.ndarray] = {}
+    remaining: list[str] = []
+    for h in dict.fromkeys(hashes):
+        vec = _memory.get((model_name, task, h))
+        if vec is None:
+            remaining.append(h)
+        else:
+            found[h] = vec
+    _count("memory_hits", len(found))
+
+    if remaining:
+        from_db = _load_from_db(model_name, task, remaining)
+        for h, vec in from_db.items():
+            _memory.set((model_name, task, h), vec)
+        found.update(from_db)
+        _count("db_hits", len(from_db))
+        _count("misses", len(remaining) - len(from_db))
+    return found
+
+
+def put_many(model_name: str, task: str, vectors: dict[str, Sequence[float] | np.ndarray]) -> dict[str, np.ndarray]:
+    """Cache vectors and return them as the float32 arrays get_many would."""
+    global _writes_since_evict
+    if not vectors:
+        return {}
+    vectors = {h: _as_vector(vec) for h, vec in vectors.items()}
+    for h, vec in vectors.items():
+        _memory.set((model_name, task, h), vec)
+    _store_in_db(model_name, task, vectors)
+    _count("writes", len(vectors))
+
+    with _lock:
+        _writes_since_evict += len(vectors)
+        due = _writes_since_evict >= EVICT_EVERY
+        if due:
+            _writes_since_evict = 0
+    if due:
+        evict()
+    return vectors
@@ -0,0 +1,69 @@
+# Optional on-disk store of each user's normalized chunk embeddings. A shard is
+# a pair of .npy files per corpus version: a contiguous float32 matrix that is
+# opened with numpy's memmap, and the chunk ids of its rows. Every API worker
+# then scores against the same OS page cache instead of decoding embeddings
+# from Postgres into its own heap. Set RAG_SHARD_DIR to enable.
+
+import os
+import threading
+import uuid
+
+import numpy as np
+
+SHARD_DIR = os.environ.get("RAG_SHARD_DIR") or None
+
+
+def enabled() -> bool:
+    return SHARD_DIR is not None
+
+
+def _user_dir(user_id: uuid.UUID) -> str:
+    return os.path.join(SHARD_DIR, str(user_id))
+
+
+def _paths(user_id: uuid.UUID, version: int) -> tuple[str, str]:
+    base = os.path.join(_user_dir(user_id), f"v{version}")
+    return base + ".f32.npy", base + ".ids.npy"
+
+
+def load_shard(user_id: uuid.UUID, version: int) -> tuple[list[uuid.UUID], np.ndarray] | None:
+    """(chunk ids, read-only memmapped matrix) for this corpus version, or None."""
+    if not enabled():
+        return None
+    matrix_path, ids_path = _paths(user_id, version)
+    try:
+        matrix = np.load(matrix_path, mmap_mode="r")
+        ids = np.load(ids_path)
+    except (OSError, ValueError):
+        return None
+    if matrix.ndim != 2 or matrix.shape[0] != ids.shape[0]:
+        return None
+    return [uuid.UUID(bytes=b) for b in ids.tolist()], matrix
+
+
+def _write_atomic(path: str, array: np.ndarray) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def write_shard(
+    user_id: uuid.UUID, version: int, chunk_ids: list[uuid.UUID], matrix: np.ndarray
+) -> None:
+    """Write the shard for this version and drop older ones. Failures are ignored."""
+    if not enabled():
+        return
+    matrix_path, ids_path = _paths(user_id, version)
+    try:
+        os.makedirs(_user_dir(user_id), exist_ok=True)
+        ids = np.array([cid.bytes for cid in chunk_ids], dtype="S16")
+        # ids first: readers need both files and check that their lengths agree.
+        _write_atomic(ids_path, ids)
+        _write_atomic(matrix_path, np.ascontiguousarray(matrix, dtype=np.float32))
+        current = {os.path.basename(matrix_path), os.path.basename(ids_path)}
+        for name in os.listdir(_user_dir(user_id)):
+            if name not in current and not name.endswith(".tmp"):
+                os.remove(os.path.join(_user_dir(user_id), name))
+    except OSError:
+        pass
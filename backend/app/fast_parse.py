@@ -0,0 +1,288 @@
+# Rule-based parsing of resumes in the Jake's template layout, the one
+# latex_resume.py renders. It reads layout-mode text from pdf_text (right-hand
+# columns such as dates and locations are separated from the left by a run of
+# spaces) and returns only the fields whose every entry matched the expected
+# shape, in the same JSON shape the parse prompts return. parse sends the
+# prompts only for groups with a field missing here.
+
+import re
+from typing import Any
+
+# Normalized header text (letters only, lowercased) -> section.
+SECTION_HEADERS = {
+    "education": "education",
+    "experience": "experience",
+    "workexperience": "experience",
+    "professionalexperience": "experience",
+    "relevantexperience": "experience",
+    "projects": "projects",
+    "personalprojects": "projects",
+    "technicalskills": "skills",
+    "skills": "skills",
+}
+# The layout is recognized when at least this many known sections appear.
+MIN_SECTIONS = 3
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s+)?\d{{4}}|Present|Current|Now"
+_DATE_RANGE_RE = re.compile(
+    rf"(?P<start>{_DATE})(?:\s*(?:–|—|-{{1,2}}|to)\s*(?P<end>{_DATE}))?", re.IGNORECASE
+)
+_LOCATION_RE = re.compile(r"[^,]+,\s*[A-Za-z .]+|Remote|Hybrid", re.IGNORECASE)
+_COLUMN_GAP_RE = re.compile(r"\s{3,}")
+_BULLET_RE = re.compile(r"^[•●◦▪∗\-–·]\s*")
+_UNKNOWN_HEADER_RE = re.compile(r"^[A-Z][A-Z &/]{2,}$")
+_EMAIL_RE = re.compile(r"^[\w.+-]+@[\w-]+(\.[\w-]+)+$")
+_PHONE_RE = re.compile(r"^\+?[\d\s().-]{10,}$")
+_URL_RE = re.compile(r"^(https?://)?[\w-]+(\.[\w-]+)+(/\S*)?$")
+_CONTACT_SPLIT_RE = re.compile(r"\s*\|\s*|\s+/\s+")
+
+
+class _Unparsed(Exception):
+    """A section does not have the template's shape."""
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _columns(line: str) -> list[str]:
+    return _COLUMN_GAP_RE.split(line.strip())
+
+
+def _date_range(text: str) -> tuple[str, str | None]:
+    m = _DATE_RANGE_RE.fullmatch(text.strip())
+    if m is None:
+        raise _Unparsed(text)
+    return m.group("start"), m.group("end")
+
+
+def _location(text: str) -> str:
+    if not _LOCATION_RE.fullmatch(text.strip()):
+        raise _Unparsed(text)
+    return text.strip()
+
+
+def _split_sections(lines: list[str]) -> tuple[list[str], dict[str, list[str]], bool] | None:
+    """
+    (preamble, known sections, whether any text fell outside them). Text under
+    an unknown header may be a known section under another name ("WORK
+    HISTORY"), so a known section missing from such a resume is not absent.
+    """
+    preamble: list[str] = []
+    sections: dict[str, list[str]] = {}
+    current: list[str] | None = None
+    unassigned = False
+    for line in lines:
+        key = re.sub(r"[^a-z]", "", line.lower())
+        if key in SECTION_HEADERS:
+            if SECTION_HEADERS[key] in sections:
+                return None
+            current = sections[SECTION_HEADERS[key]] = []
+        elif _UNKNOWN_HEADER_RE.match(line.strip()) and (current is not None or sections):
+            # A section we have no rules for (Awards, Work History...).
+            current = None
+            unassigned = True
+        elif current is not None:
+            current.append(line)
+        elif not sections:
+            preamble.append(line)
+        else:
+            unassigned = True
+    if len(sections) < MIN_SECTIONS:
+        return None
+    return preamble, sections, unassigned
+
+
+def _entries(lines: list[str], header_lines: int) -> list[tuple[list[str], list[str]]]:
+    """
+    Group section lines into entries of (header_lines header lines, bullets).
+    Indented lines without a bullet continue the previous bullet.
+    """
+    base = min(_indent(line) for line in lines)
+    entries: list[tuple[list[str], list[str]]] = []
+    for line in lines:
+        text = line.strip()
+        if _BULLET_RE.match(text):
+            if not entries:
+                raise _Unparsed(line)
+            entries[-1][1].append(_BULLET_RE.sub("", text))
+        elif entries and entries[-1][1] and _indent(line) > base and len(_columns(line)) == 1:
+            entries[-1][1][-1] += " " + text
+        elif entries and not entries[-1][1] and len(entries[-1][0]) < header_lines:
+            entries[-1][0].append(line)
+        else:
+            entries.append(([line], []))
+    return entries
+
+
+def _heading(preamble: list[str]) -> dict[str, Any]:
+    if not 2 <= len(preamble) <= 3:
+        raise _Unparsed(preamble)
+    heading: dict[str, Any] = {
+        "name": preamble[0].strip(),
+        "phone": None,
+        "email": None,
+        "location": None,
+        "linkedin": None,
+        "github": None,
+    }
+    for line in preamble[1:]:
+        for bit in (b.strip() for b in _CONTACT_SPLIT_RE.split(line.strip())):
+            if not bit:
+                continue
+            if _EMAIL_RE.match(bit):
+                heading["email"] = bit
+            elif "linkedin" in bit.lower():
+                heading["linkedin"] = bit
+            elif "github" in bit.lower():
+                heading["github"] = bit
+            elif _PHONE_RE.match(bit) and sum(ch.isdigit() for ch in bit) >= 10:
+                heading["phone"] = bit
+            elif _LOCATION_RE.fullmatch(bit) and heading["location"] is None:
+                heading["location"] = bit
+            elif not _URL_RE.match(bit):
+                raise _Unparsed(bit)
+    if not heading["name"] or not (heading["email"] or heading["phone"]):
+        raise _Unparsed(preamble)
+    return heading
+
+
+def _education(lines: list[str]) -> list[dict[str, Any]]:
+    out = []
+    for header, _details in _entries(lines, 2):
+        if len(header) != 2:
+            raise _Unparsed(header)
+        school, location = _pair(header[0])
+        degree, dates = _pair(header[1])
+        start, end = _date_range(dates)
+        out.append(
+            {"school": school, "location": _location(location), "degree": degree, "start": start, "end": end}
+        )
+    return out
+
+
+def _experience(lines: list[str]) -> list[dict[str, Any]]:
+    out = []
+    for header, details in _entries(lines, 2):
+        if len(header) != 2:
+            raise _Unparsed(header)
+        title, dates = _pair(header[0])
+        company, location = _pair(header[1])
+        start, end = _date_range(dates)
+        out.append(
+            {
+                "company": company,
+                "title": title,
+                "location": _location(location),
+                "start": start,
+                "end": end,
+                "details": details,
+            }
+        )
+    return out
+
+
+def _projects(lines: list[str]) -> list[dict[str, Any]]:
+    out = []
+    for header, details in _entries(lines, 1):
+        if len(header) != 1:
+            raise _Unparsed(header)
+        columns = _columns(header[0])
+        if len(columns) > 2:
+            raise _Unparsed(header)
+        left, date_range = columns[0], columns[1] if len(columns) == 2 else None
+        if date_range is not None:
+            _date_range(date_range)
+        name, bar, tech = left.partition("|")
+        if not bar and date_range is None:
+            raise _Unparsed(header)
+        out.append(
+            {
+                "name": name.strip(),
+                "description": details,
+                "tech": _split_list(tech) if bar else None,
+                "dateRange": date_range,
+            }
+        )
+    return out
+
+
+def _skills(lines: list[str]) -> tuple[list[str], list[str]]:
+    groups: list[tuple[str, str]] = []
+    for line in lines:
+        label, colon, items = line.strip().partition(":")
+        if colon and len(label) <= 40:
+            groups.append((label.strip().lower(), items))
+        elif groups:
+            groups[-1] = (groups[-1][0], groups[-1][1] + " " + line.strip())
+        else:
+            raise _Unparsed(line)
+    languages: list[str] = []
+    technologies: list[str] = []
+    for label, items in groups:
+        (languages if "language" in label else technologies).extend(_split_list(items))
+    return languages, technologies
+
+
+def _pair(line: str) -> tuple[str, str]:
+    columns = _columns(line)
+    if len(columns) != 2:
+        raise _Unparsed(line)
+    return columns[0], columns[1]
+
+
+def _split_list(text: str) -> list[str]:
+    """Comma-separated items, ignoring commas inside parentheses."""
+    items, depth, current = [], 0, ""
+    for ch in text:
+        depth += (ch == "(") - (ch == ")")
+        if ch == "," and depth <= 0:
+            items.append(current)
+            current = ""
+        else:
+            current += ch
+    items.append(current)
+    return [item.strip() for item in items if item.strip()]
+
+
+def parse_layout(text: str) -> dict[str, Any]:
+    """
+    Fields parsed with confidence from layout-mode resume text: any of heading,
+    education, experience, projects, languages and technologies. Empty when
+    the text does not look like the template. A known section that is absent
+    parses as None, unless some text sat under headers the rules do not know,
+    in which case it is left to the model.
+    """
+    lines = [line.rstrip() for line in (text or "").splitlines() if line.strip()]
+    split = _split_sections(lines)
+    if split is None:
+        return {}
+    preamble, sections, unassigned = split
+
+    fields: dict[str, Any] = {}
+    parsers = {
+        "heading": lambda: _heading(preamble),
+        "education": lambda: _education(sections["education"]),
+        "experience": lambda: _experience(sections["experience"]),
+        "projects": lambda: _projects(sections["projects"]),
+    }
+    for field, parse_section in parsers.items():
+        if field != "heading" and not sections.get(field):
+            if field not in sections and unassigned:
+                continue
+            fields[field] = None
+            continue
+        try:
+            fields[field] = parse_section()
+        except _Unparsed:
+            pass
+    if not sections.get("skills"):
+        if "skills" in sections or not unassigned:
+            fields["languages"] = fields["technologies"] = None
+    else:
+        try:
+            fields["languages"], fields["technologies"] = _skills(sections["skills"])
+        except _Unparsed:
+            pass
+    return fields
@@ -0,0 +1,160 @@
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.db.models import KnowledgeIngestJob
+from app.rag import KnowledgeStoreUnavailableError, ingest_user_knowledge
+
+# Knowledge documents are chunked and embedded on this local pool instead of
+# inside the request. Job state lives in the database so any API worker can
+# report it. The pool does not survive a restart, so a queued or running job
+# that has not moved for INGEST_STALE_SECONDS is reported as failed.
+INGEST_MAX_WORKERS = int(os.environ.get("INGEST_MAX_WORKERS", "2"))
+INGEST_STALE_SECONDS = int(os.environ.get("INGEST_STALE_SECONDS", "900"))
+STALE_JOB_ERROR = "ingestion was interrupted; please try again"
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=INGEST_MAX_WORKERS, thread_name_prefix="knowledge-ingest")
+
+
+def _job_to_dict(job: KnowledgeIngestJob) -> dict[str, Any]:
+    return {
+        "jobId": str(job.id),
+        "status": job.status,
+        "title": job.title,
+        "documentId": str(job.document_id) if job.document_id else None,
+        "chunksEmbedded": job.chunks_embedded,
+        "chunksTotal": job.chunks_total,
+        "error": job.error,
+    }
+
+
+def _update_job(job_id: uuid.UUID, **values: Any) -> None:
+    db = SessionLocal()
+    try:
+        db.query(KnowledgeIngestJob).filter(KnowledgeIngestJob.id == job_id).update(values)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("could not update knowledge ingest job %s with %s", job_id, sorted(values))
+    finally:
+        db.close()
+
+
+def _stale_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=INGEST_STALE_SECONDS)
+
+
+def fail_stale_jobs(db: Session) -> int:
+    """Mark queued or running jobs that stopped making progress as failed."""
+    try:
+        failed = (
+            db.query(KnowledgeIngestJob)
+            .filter(
+                KnowledgeIngestJob.status.in_(("queued", "running")),
+                func.coalesce(KnowledgeIngestJob.updated_at, KnowledgeIngestJob.created_at) < _stale_cutoff(),
+            )
+            .update({"status": "failed", "error": STALE_JOB_ERROR}, synchronize_session=False)
+        )
+        db.commit()
+        return failed
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("could not fail stale knowledge ingest jobs")
+        return 0
+
+
+def _run_ingestion(
+    job_id: uuid.UUID, user_id: uuid.UUID, title: str, content: str, source_type: str
+) -> None:
+    _update_job(job_id, status="running")
+
+    def on_progress(done: int, total: int) -> None:
+        _update_job(job_id, chunks_embedded=done, chunks_total=total)
+
+    db = SessionLocal()
+    try:
+        doc, chunk_count = ingest_user_knowledge(
+            db=db,
+            user_id=user_id,
+            title=title,
+            content=content,
+            source_type=source_type,
+            on_progress=on_progress,
+        )
+        _update_job(
+            job_id,
+            status="completed",
+            document_id=doc.id,
+            chunks_embedded=chunk_count,
+            chunks_total=chunk_count,
+        )
+    except KnowledgeStoreUnavailableError:
+        _update_job(job_id, status="failed", error="knowledge storage is unavailable")
+    except Exception as exc:
+        logger.exception("knowledge ingest job %s failed", job_id)
+        _update_job(job_id, status="failed", error=f"ingestion failed: {type(exc).__name__}")
+    finally:
+        db.close()
+
+
+def enqueue_knowledge_ingestion(
+    db: Session,
+    user_id: uuid.UUID,
+    title: str,
+    content: str,
+    source_type: str = "note",
+) -> dict[str, Any]:
+    """Record an ingestion job, hand it to the worker pool and return its status."""
+    try:
+        job = KnowledgeIngestJob(
+            user_id=user_id,
+            title=(title or "Untitled").strip()[:256] or "Untitled",
+            status="queued",
+            chunks_total=0,
+            chunks_embedded=0,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+
+    _executor.submit(_run_ingestion, job.id, user_id, title, content, source_type)
+    return _job_to_dict(job)
+
+
+def get_knowledge_ingest_job(
+    db: Session, user_id: uuid.UUID, job_id: str | uuid.UUID
+) -> dict[str, Any] | None:
+    try:
+        parsed_job_id = job_id if isinstance(job_id, uuid.UUID) else uuid.UUID(str(job_id))
+    except (ValueError, TypeError):
+        return None
+
+    try:
+        job = (
+            db.query(KnowledgeIngestJob)
+            .filter(KnowledgeIngestJob.id == parsed_job_id, KnowledgeIngestJob.user_id == user_id)
+            .first()
+        )
+        if job is not None and job.status in ("queued", "running"):
+            last_seen = job.updated_at or job.created_at
+            if last_seen is not None and last_seen < _stale_cutoff():
+                job.status = "failed"
+                job.error = STALE_JOB_ERROR
+                db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    return _job_to_dict(job) if job is not None else None
@@ -5,8 +5,9 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import text
-from app.database import init_db, engine, Base
-from app.db.models import User, IgnoredJob, UserKnowledgeDocument, UserKnowledgeChunk  # noqa: F401 - register tables with Base
+from app.database import init_db, engine, Base, SessionLocal
+from app.db.models import User, IgnoredJob, UserKnowledgeDocument, UserKnowledgeChunk, KnowledgeIngestJob, EmbeddingCacheEntry, TailorCacheEntry, ParseCacheEntry  # noqa: F401 - register tables with Base
+from app.rag import backfill_lexical_index, backfill_minhash_signatures, backfill_quantized_embeddings, migrate_embeddings_to_binary
 
 def main():
     
@@ -36,8 +37,38 @@ def main():
         # Add new columns to existing users table if present (idempotent)
         with engine.connect() as conn:
             conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS default_resume JSONB"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS knowledge_version INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS token_count INTEGER"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS term_postings BYTEA"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS text_hash VARCHAR(64)"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_vec BYTEA"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_dim INTEGER"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_dtype VARCHAR(8)"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(128)"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_q8 BYTEA"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS embedding_scale DOUBLE PRECISION"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS minhash BYTEA"))
+            conn.execute(text("ALTER TABLE user_knowledge_chunks ADD COLUMN IF NOT EXISTS duplicate_of_id UUID REFERENCES user_knowledge_chunks(id) ON DELETE SET NULL"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_user_knowledge_chunks_duplicate_of_id ON user_knowledge_chunks (duplicate_of_id)"))
             conn.commit()
         print("Database tables created successfully")
+
+        db = SessionLocal()
+        try:
+            indexed = backfill_lexical_index(db)
+            converted = migrate_embeddings_to_binary(db)
+            quantized = backfill_quantized_embeddings(db)
+            signed = backfill_minhash_signatures(db)
+        finally:
+            db.close()
+        if indexed:
+            print(f"Indexed {indexed} existing knowledge chunks for keyword search")
+        if converted:
+            print(f"Converted {converted} knowledge chunk embeddings to binary storage")
+        if quantized:
+            print(f"Quantized {quantized} knowledge chunk embeddings for first-pass scoring")
+        if signed:
+            print(f"Computed near-duplicate signatures for {signed} knowledge chunks")
         
         # Verify by listing tables
         from sqlalchemy import inspect
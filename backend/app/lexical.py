@@ -0,0 +1,122 @@
+import math
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+# Keeps technology names intact: "c++", "c#", "node.js", "grpc", "k8s".
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or our "
+    "that the their this to was we were will with you your".split()
+)
+
+MAX_TERM_LENGTH = 64
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# A chunk's postings are stored as one packed array of (term id, tf) pairs.
+# Term ids are crc32 hashes of the term, so there is no vocabulary to keep in
+# sync; the rare collision merges two terms' counts.
+POSTING_DTYPE = np.dtype([("term", "<u4"), ("tf", "<u2")])
+MAX_TF = np.iinfo(np.uint16).max
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        tok
+        for tok in _TOKEN_RE.findall((text or "").lower())
+        if tok not in STOPWORDS and len(tok) <= MAX_TERM_LENGTH
+    ]
+
+
+def term_frequencies(text: str) -> tuple[Counter, int]:
+    """Term counts for one chunk, plus its length in tokens."""
+    tokens = tokenize(text)
+    return Counter(tokens), len(tokens)
+
+
+def term_id(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def pack_postings(counts: dict[str, int]) -> bytes:
+    """A chunk's term counts as packed (term id, tf) pairs, sorted by term id."""
+    merged: dict[int, int] = {}
+    for term, tf in counts.items():
+        tid = term_id(term)
+        merged[tid] = merged.get(tid, 0) + tf
+    packed = np.empty(len(merged), dtype=POSTING_DTYPE)
+    packed["term"] = list(merged)
+    packed["tf"] = np.minimum(list(merged.values()), MAX_TF)
+    packed.sort(order="term")
+    return packed.tobytes()
+
+
+@dataclass
+class Postings:
+    """
+    Inverted index rebuilt from packed per-chunk postings. The rows and term
+    frequencies of term_ids[i] are rows[offsets[i]:offsets[i + 1]].
+    """
+
+    term_ids: np.ndarray  # uint32, sorted and unique
+    offsets: np.ndarray  # int64, shape (len(term_ids) + 1,)
+    rows: np.ndarray  # int32
+    tfs: np.ndarray  # float32
+
+    @classmethod
+    def from_packed(cls, blobs: Iterable[bytes | None]) -> "Postings":
+        """Postings for documents 0..n-1 from their pack_postings bytes (None for none)."""
+        arrays = [np.frombuffer(b or b"", dtype=POSTING_DTYPE) for b in blobs]
+        packed = np.concatenate(arrays) if arrays else np.empty(0, dtype=POSTING_DTYPE)
+        doc_rows = np.repeat(np.arange(len(arrays), dtype=np.int32), [len(a) for a in arrays])
+        order = np.argsort(packed["term"], kind="stable")
+        terms = packed["term"][order]
+        term_ids, starts = np.unique(terms, return_index=True)
+        return cls(
+            term_ids=term_ids,
+            offsets=np.append(starts, len(terms)).astype(np.int64),
+            rows=doc_rows[order],
+            tfs=packed["tf"][order].astype(np.float32),
+        )
+
+    def get(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        """(document rows, term frequencies) for term, or None when no document has it."""
+        tid = term_id(term)
+        i = int(np.searchsorted(self.term_ids, tid))
+        if i == len(self.term_ids) or self.term_ids[i] != tid:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.rows[start:end], self.tfs[start:end]
+
+
+def bm25_scores(
+    postings: Postings,
+    token_counts: np.ndarray,
+    query_terms: list[str],
+) -> np.ndarray:
+    """
+    Okapi BM25 score of every document for the query.
+    postings.get(term) gives (document row indices, term frequencies in those rows).
+    """
+    n_docs = token_counts.shape[0]
+    scores = np.zeros(n_docs, dtype=np.float32)
+    if n_docs == 0:
+        return scores
+    avg_len = float(token_counts.mean()) or 1.0
+    length_norm = BM25_K1 * (1.0 - BM25_B + BM25_B * token_counts / avg_len)
+    for term in dict.fromkeys(query_terms):
+        posting = postings.get(term)
+        if posting is None:
+            continue
+        rows, tf = posting
+        df = rows.shape[0]
+        idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        scores[rows] += idf * tf * (BM25_K1 + 1.0) / (tf + length_norm[rows])
+    return scores
@@ -27,11 +27,10 @@ def get_model():
             "Or create a .env file with: GOOGLE_API_KEY=your_key"
         )
 
-    model_name = os.environ.get("GOOGLE_MODEL", "gemini-3.1-flash-lite-preview")
     #TODO allow any model from any provider
 
     return ChatGoogleGenerativeAI(
-        model=model_name,
+        model=get_model_name(),
         retries=2,
         api_key=api_key,
         temperature=0,
@@ -39,11 +38,19 @@ def get_model():
     )
 
 
+def get_model_name() -> str:
+    return os.environ.get("GOOGLE_MODEL", "gemini-3.1-flash-lite-preview")
+
+
+def get_embedding_model_name() -> str:
+    return os.environ.get("GOOGLE_EMBEDDING_MODEL", "models/text-embedding-004")
+
+
 def get_embeddings_model():
     api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
         return None
-    model_name = os.environ.get("GOOGLE_EMBEDDING_MODEL", "models/text-embedding-004")
+    model_name = get_embedding_model_name()
     try:
         return GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=api_key)
     except Exception:
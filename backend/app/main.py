@@ -1,6 +1,10 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import router
+from app.database import SessionLocal
+from app.ingest_queue import fail_stale_jobs
 
 app = FastAPI()
 
@@ -19,6 +23,21 @@ app.add_middleware(
 
 app.include_router( router )
 
+
+def _fail_stale_ingest_jobs() -> int:
+    db = SessionLocal()
+    try:
+        return fail_stale_jobs(db)
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+async def startup():
+    # Fail jobs a previous process left queued or running; any too recent to
+    # call stale yet are failed when next polled after INGEST_STALE_SECONDS.
+    await asyncio.to_thread(_fail_stale_ingest_jobs)
+
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
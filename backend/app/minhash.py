@@ -0,0 +1,92 @@
+import re
+import zlib
+
+import numpy as np
+
+# MinHash signatures over word trigrams. Two chunks whose signatures agree in
+# a fraction s of positions have an estimated Jaccard similarity of s between
+# their shingle sets. Signatures are split into BANDS bands for LSH lookup.
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+_PRIME = np.uint64((1 << 61) - 1)
+# Fixed seed: stored signatures must stay comparable across processes.
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str) -> set[int]:
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i : i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text: str) -> np.ndarray | None:
+    """
+    uint32 MinHash signature of length NUM_PERM, or None for text without
+    words. Such text has no shingles to compare, so it never matches anything.
+    """
+    hashes = np.fromiter(shingles(text), dtype=np.uint64)
+    if hashes.size == 0:
+        return None
+    # a * x + b wraps modulo 2**64 before the prime modulus, as in datasketch;
+    # a and b must span the whole field or the hash stays nearly monotonic in x.
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<u4")
+
+
+class LSHIndex:
+    """Banded LSH over signatures; find() verifies candidates before matching."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._buckets: dict[tuple[int, bytes], list] = {}
+        self._signatures: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _bands(self, sig: np.ndarray):
+        raw = to_bytes(sig)
+        step = ROWS_PER_BAND * 4
+        for band in range(BANDS):
+            yield band, raw[band * step : (band + 1) * step]
+
+    def add(self, key, sig: np.ndarray) -> None:
+        self._signatures[key] = sig
+        for bucket in self._bands(sig):
+            self._buckets.setdefault(bucket, []).append(key)
+
+    def find(self, sig: np.ndarray):
+        """The most similar indexed key at or above the threshold, or None."""
+        best_key, best = None, self.threshold
+        seen = set()
+        for bucket in self._bands(sig):
+            for key in self._buckets.get(bucket, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = similarity(sig, self._signatures[key])
+                if score >= best:
+                    best_key, best = key, score
+        return best_key
@@ -1,7 +1,8 @@
-import io
+import asyncio
 import os
 import json
 import re
+from typing import Any
 
 from app.models import (
     Resume,
@@ -11,8 +12,10 @@ from app.models import (
     Project,
 )
 from app.prompts import parse_prompts, parse_schema_examples
-from app.llm import get_model, parse_json, sanitize_nulls
-from pypdf import PdfReader
+from app import parse_cache
+from app.fast_parse import parse_layout
+from app.llm import get_model, get_model_name, parse_json, sanitize_nulls
+from app.pdf_text import extract_text
 
 
 try:
@@ -22,43 +25,112 @@ except Exception:
     pass
 
 
-def parse(file: bytes) -> Resume:
-    stream = io.BytesIO(file)
-    reader = PdfReader(stream)
-    page = reader.pages[0]
+PARSE_KEYS = ["heading_education", "experience_projects", "summary_skills"]
+# Top-level fields each parse prompt returns.
+PARSE_FIELDS = {
+    "heading_education": ["heading", "education"],
+    "experience_projects": ["experience", "projects"],
+    "summary_skills": ["languages", "technologies"],
+}
 
-    model = get_model()
+# Seconds each parse prompt may take before its sections come back empty.
+PARSE_PROMPT_TIMEOUT = float(os.environ.get("PARSE_PROMPT_TIMEOUT", "60"))
 
-    page_text = page.extract_text()
 
-    keys = ["heading_education", "experience_projects", "summary_skills"]
+def _parse_messages(key: str, prompt: str, page_text: str) -> list[tuple[str, str]]:
+    output_instructions = (
+        "IMPORTANT: Reply with valid JSON only and nothing else. "
+        "Do NOT include any explanatory text, markdown, or backticks. "
+        "For any missing or unknown values, use null — NEVER use placeholder strings like "
+        "\"not specified\", \"N/A\", \"none\", \"unknown\", or empty strings. "
+        "The JSON must match the schema example below exactly (use the same keys):\n"
+        + json.dumps(parse_schema_examples[key], indent=2)
+    )
+
+    system_prompt = prompt + output_instructions
+    return [("system", system_prompt), ("user", page_text)]
 
-    parsed_outputs: dict[str, dict | None] = {}
 
-    for key, prompt in zip(keys, parse_prompts):
-        output_instructions = (
-            "IMPORTANT: Reply with valid JSON only and nothing else. "
-            "Do NOT include any explanatory text, markdown, or backticks. "
-            "For any missing or unknown values, use null — NEVER use placeholder strings like "
-            "\"not specified\", \"N/A\", \"none\", \"unknown\", or empty strings. "
-            "The JSON must match the schema example below exactly (use the same keys):\n"
-            + json.dumps(parse_schema_examples[key], indent=2)
+async def _aparse_prompt(model: Any, key: str, prompt: str, page_text: str) -> dict | None:
+    """One parse prompt; None if it times out or its reply is not JSON."""
+    try:
+        res = await asyncio.wait_for(
+            model.ainvoke(_parse_messages(key, prompt, page_text)), timeout=PARSE_PROMPT_TIMEOUT
         )
+    except asyncio.TimeoutError:
+        print(f"timed out parsing {key}")
+        return None
+    raw = getattr(res, "text", str(res))
+
+    parsed = parse_json(raw)
+
+    if parsed is None:
+        print(f"failed to parse JSON for {key}")
+        return None
+    return sanitize_nulls(parsed)
+
+
+async def _aparse_outputs(model: Any, page_text: str, keys: list[str] = PARSE_KEYS) -> dict[str, dict | None]:
+    """Run the parse prompts for keys concurrently; they only share the page text."""
+    prompts = dict(zip(PARSE_KEYS, parse_prompts))
+    results = await asyncio.gather(*(_aparse_prompt(model, key, prompts[key], page_text) for key in keys))
+    return dict(zip(keys, results))
+
+
+def _prompt_text(layout_text: str) -> str:
+    """Layout-mode text without indentation and with column gaps shortened."""
+    lines = (re.sub(r"[ \t]{3,}", "   ", line.strip()) for line in layout_text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _merge_outputs(
+    parsed_outputs: dict[str, dict | None], fast_fields: dict[str, Any]
+) -> dict[str, dict | None]:
+    """Prompt outputs with every field fast_parse handled taken from fast_fields."""
+    merged: dict[str, dict | None] = {}
+    for key, fields in PARSE_FIELDS.items():
+        output = parsed_outputs.get(key)
+        known = {field: fast_fields[field] for field in fields if field in fast_fields}
+        merged[key] = {**(output if isinstance(output, dict) else {}), **known} if output or known else None
+    return merged
+
+
+async def aparse(file: bytes, use_cache: bool = True) -> Resume:
+    """
+    parse for callers already running an event loop. Results are cached by
+    the PDF's content in parse_cache when every prompt succeeded;
+    use_cache=False skips the lookup but still refreshes the entry.
+    """
+    key = parse_cache.cache_key(file, get_model_name())
+    if use_cache:
+        cached = await asyncio.to_thread(parse_cache.get, key)
+        if cached is not None:
+            try:
+                return Resume.model_validate(cached)
+            except ValueError:
+                pass
+
+    page_text = await extract_text(file)
+
+    # Template resumes are mostly handled by rules; prompt only for the rest.
+    fast_fields = parse_layout(page_text)
+    pending = [key for key, fields in PARSE_FIELDS.items() if any(f not in fast_fields for f in fields)]
+    parsed_outputs: dict[str, dict | None] = {}
+    if pending:
+        model = get_model()
+        parsed_outputs = await _aparse_outputs(model, _prompt_text(page_text), pending)
 
-        system_prompt = prompt + output_instructions
-        message = [("system", system_prompt), ("user", page_text)]
+    resume = _build_resume(_merge_outputs(parsed_outputs, fast_fields))
+    if all(output is not None for output in parsed_outputs.values()):
+        await asyncio.to_thread(parse_cache.put, key, resume.model_dump())
+    return resume
 
-        res = model.invoke(message)
-        raw = getattr(res, "text", str(res))
 
-        parsed = parse_json(raw)
+def parse(file: bytes, use_cache: bool = True) -> Resume:
+    return asyncio.run(aparse(file, use_cache))
 
-        if parsed is None:
-            print(f"failed to parse JSON for {key}")
-            parsed_outputs[key] = None
-        else:
-            parsed_outputs[key] = sanitize_nulls(parsed)
 
+def _build_resume(parsed_outputs: dict[str, dict | None]) -> Resume:
     heading_education = parsed_outputs.get("heading_education") or {}
     experience_projects = parsed_outputs.get("experience_projects") or {}
     summary_skills = parsed_outputs.get("summary_skills") or {}
@@ -0,0 +1,52 @@
+# Persistent cache of parsed resumes, keyed by the PDF's content. People upload
+# the same file again and again, and parsing it costs three model calls. The
+# key covers the PDF bytes, the model name and a version derived from the
+# parse prompts and page cap, so prompt edits invalidate old entries without
+# a migration. The table is trimmed to MAX_ROWS least recently used entries;
+# storage is db_cache.DbCache, shared with the tailor cache.
+
+import hashlib
+import json
+import os
+from typing import Any
+
+from app import pdf_text
+from app.db.models import ParseCacheEntry
+from app.db_cache import DbCache
+from app.prompts import parse_prompts, parse_schema_examples
+
+MAX_ROWS = int(os.environ.get("PARSE_CACHE_MAX_ROWS", "20000"))
+EVICT_EVERY = int(os.environ.get("PARSE_CACHE_EVICT_EVERY", "200"))
+
+# Bump when parse.py changes the instructions it wraps around the prompts or
+# the text it sends, or fast_parse changes; edits to the prompts themselves
+# change PROMPT_VERSION automatically.
+PROMPT_REVISION = 2
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(
+        [PROMPT_REVISION, parse_prompts, parse_schema_examples, pdf_text.PARSE_MAX_PAGES],
+        sort_keys=True,
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+_cache = DbCache(ParseCacheEntry, "resume", MAX_ROWS, EVICT_EVERY)
+
+
+def cache_key(file: bytes, model_name: str) -> str:
+    digest = hashlib.sha256(file).hexdigest()
+    return hashlib.sha256(f"{digest}:{model_name}:{PROMPT_VERSION}".encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> dict[str, Any] | None:
+    """The cached Resume dict for key, or None."""
+    resume = _cache.get(key)
+    return resume if isinstance(resume, dict) else None
+
+
+def put(key: str, resume: dict[str, Any]) -> None:
+    _cache.put(key, resume)
+
+
+def evict(max_rows: int = MAX_ROWS) -> int:
+    """Delete least recently used entries beyond max_rows."""
+    return _cache.evict(max_rows)
@@ -0,0 +1,91 @@
+# Text extraction for uploaded PDFs. pypdf is pure Python and holds the GIL,
+# so pages of multi-page uploads are extracted in a process pool, one task per
+# page, and text extraction time scales with cores rather than page count.
+# Single-page PDFs skip the pool; shipping the file to a worker would cost more
+# than extracting it in a thread. Text comes from pypdf's layout mode, which
+# keeps right-aligned columns (dates, locations) apart from the left-hand text
+# with runs of spaces; fast_parse relies on that.
+
+import asyncio
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator
+
+from pypdf import PdfReader
+
+# Pages beyond this are ignored; resumes are rarely longer than two.
+PARSE_MAX_PAGES = int(os.environ.get("PARSE_MAX_PAGES", "10"))
+PARSE_PDF_WORKERS = int(os.environ.get("PARSE_PDF_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Executor | None:
+    """The shared process pool, or None where processes cannot be started."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                # Workers are spawned, not forked: forking the API process would
+                # copy its event loop, DB connections and model clients.
+                _pool = ProcessPoolExecutor(
+                    max_workers=PARSE_PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            except (OSError, NotImplementedError):
+                return None
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def page_count(file: bytes) -> int:
+    return min(len(PdfReader(io.BytesIO(file)).pages), PARSE_MAX_PAGES)
+
+
+def extract_page(file: bytes, index: int) -> str:
+    """Text of one page; runs in a pool worker."""
+    return PdfReader(io.BytesIO(file)).pages[index].extract_text(extraction_mode="layout") or ""
+
+
+async def aiter_pages(file: bytes) -> AsyncIterator[tuple[int, str]]:
+    """
+    Yield (page index, text) in page order for the first PARSE_MAX_PAGES
+    pages. Every page is submitted at once, so later pages are usually ready
+    by the time earlier ones have been consumed.
+    """
+    count = await asyncio.to_thread(page_count, file)
+    if count == 0:
+        return
+    if count == 1:
+        yield 0, await asyncio.to_thread(extract_page, file, 0)
+        return
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    futures = [loop.run_in_executor(pool, extract_page, file, i) for i in range(count)]
+    try:
+        for i, future in enumerate(futures):
+            try:
+                text = await future
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); finish in threads.
+                _reset_pool()
+                text = await asyncio.to_thread(extract_page, file, i)
+            yield i, text
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+async def extract_text(file: bytes) -> str:
+    """Text of the first PARSE_MAX_PAGES pages, joined with blank lines."""
+    return "\n\n".join([text async for _, text in aiter_pages(file) if text.strip()])
@@ -0,0 +1,174 @@
+# Token-budgeted assembly of tailoring prompts. Job postings often carry pages
+# of EEO and benefits text, and evidence grows with the user's knowledge base,
+# so each prompt is fitted to PROMPT_TOKEN_BUDGET: job descriptions over
+# MAX_JOB_TOKENS have boilerplate stripped and are capped, then the
+# lowest-scoring evidence chunks are dropped, then the job description and
+# finally the resume are truncated. Token counts are estimates (CHARS_PER_TOKEN characters
+# per token); asking the model's tokenizer would cost an API round trip.
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get("TAILOR_PROMPT_TOKEN_BUDGET", "6000"))
+CHARS_PER_TOKEN = 4
+# Job descriptions are always capped at MAX_JOB_TOKENS; under budget pressure
+# they are cut further, but not below MIN_JOB_TOKENS, once evidence is gone.
+MAX_JOB_TOKENS = 2048
+MIN_JOB_TOKENS = 512
+
+TRUNCATION_MARKER = "\n[truncated]"
+
+# A paragraph containing one of these is job-posting boilerplate on its own.
+_BOILERPLATE_STRONG = re.compile(
+    r"equal (employment )?opportunity employer|without regard to|reasonable accommodation|e-verify|"
+    r"pay transparency|protected veteran|affirmative action|applicant privacy notice|"
+    r"sexual orientation, gender identity|national origin",
+    re.IGNORECASE,
+)
+# Headings (normalized, see _heading_text) whose whole section is boilerplate.
+_BOILERPLATE_HEADING = re.compile(
+    r"(benefits|perks|perks (and|&) benefits|benefits (and|&) perks|what we offer|"
+    r"why you.ll love (working )?(here|with us)|compensation( (and|&) benefits)?|pay range|salary( range)?|"
+    r"equal (employment )?opportunity( employer)?|eeo( statement)?|diversity( (and|&) inclusion)?|"
+    r"accommodations?|pay transparency|privacy( notice| policy)?|e-verify|legal|disclaimer)"
+)
+# Other headings seen in postings; they end a boilerplate section.
+_JOB_HEADINGS = {
+    "about the role", "about the job", "about you", "about us", "the role", "the team", "responsibilities",
+    "requirements", "qualifications", "minimum qualifications", "preferred qualifications",
+    "basic qualifications", "what you'll do", "what you will do", "what we're looking for", "nice to have",
+}
+_MAX_HEADING_CHARS = 60
+
+
+def count_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _heading_text(line: str) -> str | None:
+    """
+    The lowercased heading if line is one: marked with "#" or a trailing
+    colon, or a heading we know. Ordinary short sentences are not headings.
+    """
+    text = line.strip()
+    name = re.sub(r"\s+", " ", text.strip("#:*= \t").lower()).replace("’", "'")
+    if not name or len(name) > _MAX_HEADING_CHARS:
+        return None
+    if text.startswith("#") or text.endswith(":") or _BOILERPLATE_HEADING.fullmatch(name) or name in _JOB_HEADINGS:
+        return name
+    return None
+
+
+def strip_boilerplate(text: str) -> str:
+    """
+    Drop EEO, benefits and legal paragraphs from a job description: the
+    sections under a boilerplate heading such as "Benefits", up to the next
+    heading, and paragraphs with an unmistakable EEO or legal phrase.
+    """
+    paragraphs = re.split(r"\n\s*\n", (text or "").replace("\r\n", "\n"))
+    kept: list[str] = []
+    skipping = False
+    for paragraph in paragraphs:
+        heading = _heading_text(paragraph.strip().split("\n", 1)[0])
+        if heading is not None:
+            skipping = bool(_BOILERPLATE_HEADING.fullmatch(heading))
+        if skipping or _BOILERPLATE_STRONG.search(paragraph):
+            continue
+        kept.append(paragraph)
+    return "\n\n".join(p.strip("\n") for p in kept).strip()
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """text cut at a word boundary to fit max_tokens, marker included."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    cut = text[:limit]
+    space = cut.rfind(" ", limit // 2)
+    if space > 0:
+        cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+@dataclass
+class AssembledPrompt:
+    system: str
+    human: str
+    tokens: dict[str, int]
+    evidence_dropped: int = 0
+    truncated: list[str] = field(default_factory=list)
+
+    @property
+    def messages(self) -> list[tuple[str, str]]:
+        return [("system", self.system), ("human", self.human)]
+
+    def report(self) -> dict[str, Any]:
+        return {"tokens": self.tokens, "evidenceDropped": self.evidence_dropped, "truncated": self.truncated}
+
+
+def assemble(
+    instructions: str,
+    resume_text: str,
+    evidence_chunks: list[dict],
+    render_evidence: Callable[[list[dict]], str],
+    job_description: str,
+    budget: int = PROMPT_TOKEN_BUDGET,
+) -> AssembledPrompt:
+    """
+    The system prompt (instructions, resume, rendered evidence) and the job
+    description as the human turn, fitted to budget. Instructions are never
+    cut. Kept evidence stays in its original order.
+    """
+    job = (job_description or "").strip()
+    if count_tokens(job) > MAX_JOB_TOKENS:
+        job = strip_boilerplate(job) or job
+    # Lowest score first, and among equal scores the later chunk first.
+    drop_order = sorted(range(len(evidence_chunks)), key=lambda i: (float(evidence_chunks[i].get("score") or 0), -i))
+    kept = set(range(len(evidence_chunks)))
+
+    def evidence_text() -> str:
+        return render_evidence([c for i, c in enumerate(evidence_chunks) if i in kept]) if kept else ""
+
+    fixed = count_tokens(instructions)
+    evidence = evidence_text()
+    truncated: list[str] = []
+
+    def over() -> int:
+        return fixed + count_tokens(resume_text) + count_tokens(evidence) + count_tokens(job) - budget
+
+    if count_tokens(job) > MAX_JOB_TOKENS:
+        job = truncate(job, MAX_JOB_TOKENS)
+        truncated.append("job")
+    for i in drop_order:
+        if over() <= 0:
+            break
+        kept.discard(i)
+        evidence = evidence_text()
+    if over() > 0:
+        cut = truncate(job, max(MIN_JOB_TOKENS, count_tokens(job) - over()))
+        if cut != job:
+            job = cut
+            if "job" not in truncated:
+                truncated.append("job")
+    if over() > 0:
+        cut = truncate(resume_text, max(0, count_tokens(resume_text) - over()))
+        if cut != resume_text:
+            resume_text = cut
+            truncated.append("resume")
+
+    tokens = {
+        "instructions": fixed,
+        "resume": count_tokens(resume_text),
+        "evidence": count_tokens(evidence),
+        "job": count_tokens(job),
+    }
+    tokens["total"] = sum(tokens.values())
+    return AssembledPrompt(
+        system=instructions + resume_text + evidence,
+        human=job,
+        tokens=tokens,
+        evidence_dropped=len(evidence_chunks) - len(kept),
+        truncated=truncated,
+    )
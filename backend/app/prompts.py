@@ -181,3 +181,26 @@ tailor_schema_examples = {
         }
     ]
 }
+
+
+# Opt-in single-call tailoring: one prompt covers every section, so the resume
+# and job description are sent once instead of once per section.
+tailor_combined = (
+    "You are an assistant tasked with providing suggestions for a resume based on a job description (provided below). "
+    "Cover the Languages, Technologies and Experience sections in one reply.\n"
+    "- languages: each suggestion targets ONE programming language. 'entryIdx' is the array index of the language "
+    "(use 0 for first). Replace: original=existing, updated=new. Remove: original=existing, updated=''. "
+    "Add: original='', updated=new language. Only suggest languages the person actually knows based on their resume context.\n"
+    "- technologies: the same rules as languages, for frameworks, tools, libraries and platforms.\n"
+    "- experience: align bullet points with the requirements and keywords of the job description without fabricating "
+    "information. 'entryIdx' is the experience entry and 'bulletIdx' the bullet point the suggestion applies to.\n"
+    "Return a single JSON object with the keys 'languages', 'technologies' and 'experience', each a JSON array of "
+    "suggestion objects with 'entryIdx', 'bulletIdx', 'original', 'updated', and 'explanation'. "
+    "Use an empty array for a section with nothing to suggest."
+)
+
+tailor_combined_schema_example = {
+    "languages": tailor_schema_examples[0][:1],
+    "technologies": tailor_schema_examples[1][:1],
+    "experience": tailor_schema_examples[2][:1],
+}
@@ -1,31 +1,146 @@
+import base64
+import itertools
 import math
+import os
+import re
 import uuid
-from typing import Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
 
+import numpy as np
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.db.models import UserKnowledgeDocument, UserKnowledgeChunk
-from app.llm import get_embeddings_model
+from app import embedding_cache, embedding_shards, minhash
+from app.cache import LRUCache
+from app.db.models import User, UserKnowledgeDocument, UserKnowledgeChunk
+from app.lexical import Postings, bm25_scores, pack_postings, term_frequencies, tokenize
+from app.llm import get_embeddings_model, get_embedding_model_name
 
 
 class KnowledgeStoreUnavailableError(RuntimeError):
     pass
 
 
-def _chunk_text(content: str, chunk_size: int = 700, overlap: int = 120) -> list[str]:
-    text = (content or "").strip()
-    if not text:
-        return []
-    chunks: list[str] = []
+@dataclass
+class _UserCorpus:
+    """Search structures for one user's chunks; row i belongs to chunk_ids[i]."""
+
+    chunk_ids: list[uuid.UUID]
+    codes: np.ndarray  # int8, shape (n_chunks, dims): normalized rows quantized per row
+    scales: np.ndarray  # float32, shape (n_chunks,): row i ~= codes[i] * scales[i]
+    token_counts: np.ndarray  # float32, shape (n_chunks,)
+    postings: Postings  # term -> (rows, term freqs), rebuilt from each chunk's term_postings
+    matrix: np.ndarray | None = None  # full-precision rows, only when memory-mapped from a shard
+    version: int = 0  # users.knowledge_version the corpus was loaded at
+
+
+# Per-process caches. Every write to a user's knowledge bumps
+# users.knowledge_version in the same transaction; cached corpora and results
+# are tagged with the version they were built from, so a change made through
+# any worker makes them stale everywhere.
+_corpus_cache = LRUCache(maxsize=int(os.environ.get("RAG_CORPUS_CACHE_SIZE", "256")))
+_result_cache = LRUCache(maxsize=int(os.environ.get("RAG_RESULT_CACHE_SIZE", "1024")))
+
+# Chunks per embed_documents call, and how many of those calls may be in flight.
+EMBED_BATCH_SIZE = int(os.environ.get("RAG_EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_CONCURRENCY = int(os.environ.get("RAG_EMBED_MAX_CONCURRENCY", "4"))
+
+# Upper bound on list_user_knowledge_documents page size.
+MAX_PAGE_SIZE = 200
+
+# Storage precision for chunk embeddings: "float32", or "float16" for half the bytes.
+EMBEDDING_DTYPE = os.environ.get("RAG_EMBEDDING_DTYPE", "float32")
+# Recorded as embedding_model for chunks that only got _fallback_embedding.
+FALLBACK_EMBEDDING_MODEL = "fallback"
+
+# Share of the fused retrieval score that comes from BM25 (the rest is cosine
+# similarity). The character-histogram fallback embedding carries little
+# signal, so lexical matches dominate when the embeddings model is unavailable.
+LEXICAL_WEIGHT = float(os.environ.get("RAG_LEXICAL_WEIGHT", "0.35"))
+FALLBACK_LEXICAL_WEIGHT = float(os.environ.get("RAG_FALLBACK_LEXICAL_WEIGHT", "0.85"))
+
+# Estimated Jaccard similarity of word trigrams at which a new chunk is stored
+# as a reference to an existing one instead of being embedded and indexed.
+DUPLICATE_THRESHOLD = float(os.environ.get("RAG_DUPLICATE_THRESHOLD", "0.9"))
+
+# Retrieval scores every chunk against its int8 codes, then rescores this many
+# of the best candidates against the full-precision embeddings.
+RESCORE_CANDIDATES = int(os.environ.get("RAG_RESCORE_CANDIDATES", "200"))
+# Rows widened to float32 at a time when scoring or quantizing, which bounds
+# the temporary memory a first pass needs.
+QUANTIZED_BLOCK_ROWS = 4096
+# Chunk ids per IN (...) when fetching full-precision rows, which keeps each
+# statement's bind parameters bounded however many rows are asked for.
+EXACT_FETCH_BATCH = 1000
+
+
+# Sentence ends, line breaks and blank lines; chunks prefer to break here.
+_BOUNDARY_RE = re.compile(r"\n\s*\n|(?<=[.!?])\s+|\n")
+
+
+def _iter_units(text: str, max_len: int, overlap: int) -> Iterator[str]:
+    """
+    Sentence/paragraph pieces of text, each keeping its trailing whitespace.
+    Pieces longer than max_len are cut into overlapping max_len windows.
+    """
+    step = max(1, max_len - overlap)
     start = 0
-    while start < len(text):
-        end = min(len(text), start + chunk_size)
-        chunks.append(text[start:end].strip())
-        if end == len(text):
-            break
-        start = max(0, end - overlap)
-    return [c for c in chunks if c]
+    for match in itertools.chain(_BOUNDARY_RE.finditer(text), [None]):
+        end = match.end() if match else len(text)
+        if end <= start:
+            continue
+        if end - start <= max_len:
+            yield text[start:end]
+        else:
+            pos = start
+            while True:
+                yield text[pos : min(end, pos + max_len)]
+                if pos + max_len >= end:
+                    break
+                pos += step
+        start = end
+
+
+def _iter_chunks(content: str, chunk_size: int = 700, overlap: int = 120) -> Iterator[str]:
+    """
+    Lazily split content into chunks of at most chunk_size characters, broken
+    on sentence/paragraph boundaries where possible. Consecutive chunks share
+    up to overlap characters of whole sentences. Only one chunk's worth of
+    text is held at a time.
+    """
+    window: deque[str] = deque()
+    size = 0
+    fresh = False  # window holds text not yet emitted in a chunk
+    for unit in _iter_units(content or "", chunk_size, overlap):
+        if window and size + len(unit) > chunk_size:
+            chunk = "".join(window).strip()
+            if chunk and fresh:
+                yield chunk
+            carried: deque[str] = deque()
+            carried_size = 0
+            while window and carried_size + len(window[-1]) <= overlap:
+                piece = window.pop()
+                carried.appendleft(piece)
+                carried_size += len(piece)
+            window, size, fresh = carried, carried_size, False
+            while window and size + len(unit) > chunk_size:
+                size -= len(window.popleft())
+        window.append(unit)
+        size += len(unit)
+        if unit.strip():
+            fresh = True
+    chunk = "".join(window).strip()
+    if chunk and fresh:
+        yield chunk
+
+
+def _chunk_text(content: str, chunk_size: int = 700, overlap: int = 120) -> list[str]:
+    return list(_iter_chunks(content, chunk_size, overlap))
 
 
 def _fallback_embedding(text: str, dims: int = 64) -> list[float]:
@@ -36,27 +151,604 @@ def _fallback_embedding(text: str, dims: int = 64) -> list[float]:
     return [v / norm for v in vec]
 
 
-def _embed_text(text: str) -> list[float]:
+def _normalize_embedding(values: Any) -> list[float] | None:
+    if not isinstance(values, list) or not values:
+        return None
+    try:
+        floats = [float(v) for v in values]
+    except (TypeError, ValueError):
+        return None
+    norm = math.sqrt(sum(v * v for v in floats)) or 1.0
+    return [v / norm for v in floats]
+
+
+def _model_embed_one(emb: Any, text: str, task: str) -> list[float] | None:
+    try:
+        if task == "query":
+            return _normalize_embedding(emb.embed_query(text))
+        results = emb.embed_documents([text])
+        return _normalize_embedding(results[0]) if results else None
+    except Exception:
+        return None
+
+
+def _model_embed_batch(emb: Any, texts: list[str], task: str = "document") -> list[list[float] | None]:
+    try:
+        if task == "query":
+            results = emb.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+        else:
+            results = emb.embed_documents(texts)
+    except Exception:
+        # One bad input can fail the whole request; retry individually so only
+        # the texts that really fail end up with a fallback embedding.
+        return [_model_embed_one(emb, t, task) for t in texts]
+    if not isinstance(results, list):
+        results = []
+    return [_normalize_embedding(results[i]) if i < len(results) else None for i in range(len(texts))]
+
+
+def _embed_query(text: str) -> tuple[np.ndarray | list[float], bool]:
+    """
+    Embed a retrieval query, consulting the embedding cache first.
+    The flag is False when the vector is only _fallback_embedding.
+    """
+    emb = get_embeddings_model()
+    if emb is None:
+        return _fallback_embedding(text), False
+    model_name = get_embedding_model_name()
+    key = embedding_cache.text_hash(text)
+    cached = embedding_cache.get_many(model_name, "query", [key]).get(key)
+    if cached is not None:
+        return cached, True
+    values = _model_embed_one(emb, text, "query")
+    if values is None:
+        return _fallback_embedding(text), False
+    return embedding_cache.put_many(model_name, "query", {key: values})[key], True
+
+
+def _embed_queries(texts: list[str]) -> list[tuple[np.ndarray | list[float], bool]]:
+    """
+    Embed several retrieval queries with a single model call for whichever
+    of them are not already cached. Same output per text as _embed_query.
+    """
+    if len(texts) == 1:
+        return [_embed_query(texts[0])]
+    emb = get_embeddings_model()
+    if emb is None:
+        return [(_fallback_embedding(t), False) for t in texts]
+    model_name = get_embedding_model_name()
+    keys = [embedding_cache.text_hash(t) for t in texts]
+    vectors = embedding_cache.get_many(model_name, "query", keys)
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    if missing:
+        results = _model_embed_batch(emb, list(missing.values()), "query")
+        fresh = {key: vec for key, vec in zip(missing, results) if vec is not None}
+        vectors.update(embedding_cache.put_many(model_name, "query", fresh))
+    return [
+        (vectors[key], True) if key in vectors else (_fallback_embedding(text), False)
+        for key, text in zip(keys, texts)
+    ]
+
+
+def _embed_text(text: str) -> np.ndarray | list[float]:
+    return _embed_query(text)[0]
+
+
+def _embed_documents(
+    texts: list[str],
+    batch_size: int | None = None,
+    max_concurrency: int | None = None,
+) -> list[tuple[np.ndarray | list[float], str]]:
+    """
+    Embed document chunks. Texts already in the embedding cache are served
+    from it; the rest go to the model with one embed_documents call per batch,
+    running up to max_concurrency batches at once. Output order matches texts;
+    any text the model fails to embed gets _fallback_embedding instead.
+    Each vector is paired with the name of the model that produced it.
+    """
+    if not texts:
+        return []
     emb = get_embeddings_model()
     if emb is None:
-        return _fallback_embedding(text)
+        return [(_fallback_embedding(t), FALLBACK_EMBEDDING_MODEL) for t in texts]
+
+    model_name = get_embedding_model_name()
+    keys = [embedding_cache.text_hash(t) for t in texts]
+    vectors = embedding_cache.get_many(model_name, "document", keys)
+    missing: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+
+    if missing:
+        pending = list(missing.values())
+        size = max(1, batch_size or EMBED_BATCH_SIZE)
+        batches = [pending[i : i + size] for i in range(0, len(pending), size)]
+        workers = max(1, min(max_concurrency or EMBED_MAX_CONCURRENCY, len(batches)))
+        if workers == 1:
+            results = [_model_embed_batch(emb, b) for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda b: _model_embed_batch(emb, b), batches))
+        fresh = {
+            key: vec
+            for key, vec in zip(missing, (v for batch in results for v in batch))
+            if vec is not None
+        }
+        vectors.update(embedding_cache.put_many(model_name, "document", fresh))
+
+    return [
+        (vectors[key], model_name)
+        if key in vectors
+        else (_fallback_embedding(text), FALLBACK_EMBEDDING_MODEL)
+        for key, text in zip(keys, texts)
+    ]
+
+
+def _embed_texts(
+    texts: list[str],
+    batch_size: int | None = None,
+    max_concurrency: int | None = None,
+) -> list[np.ndarray | list[float]]:
+    return [vec for vec, _ in _embed_documents(texts, batch_size, max_concurrency)]
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def _embedding_matrix(embeddings: list[Any]) -> np.ndarray:
+    """
+    Stack embeddings into a float32 matrix of L2-normalized rows.
+    Shorter vectors (e.g. fallback embeddings) are zero-padded, so scoring them
+    against a query is a dot product over the shared leading dimensions.
+    """
+    vectors = [e if isinstance(e, (list, np.ndarray)) else [] for e in embeddings]
+    dims = max((len(v) for v in vectors), default=0)
+    matrix = np.zeros((len(vectors), dims), dtype=np.float32)
+    for i, vec in enumerate(vectors):
+        if len(vec):
+            matrix[i, : len(vec)] = vec
+    return _normalize_rows(matrix)
+
+
+def _stored_embedding(blob: bytes | None, dtype: str | None, legacy: Any) -> np.ndarray | list | None:
+    if blob:
+        return embedding_cache.unpack_embedding(blob, dtype)
+    # Rows written before binary storage, until init_db migrates them.
+    return legacy if isinstance(legacy, list) else None
+
+
+def _blob_matrix(blobs: list[bytes | None], dtypes: list[str | None], legacy: list[Any]) -> np.ndarray:
+    """
+    Decode stored embeddings straight into one float32 matrix. When every row
+    shares a dtype and dimension the packed bytes are concatenated and viewed
+    as a single array, with no per-row Python objects at all.
+    """
+    if blobs and all(blobs) and len(set(dtypes)) == 1 and len({len(b) for b in blobs}) == 1:
+        packed = embedding_cache.unpack_embedding(b"".join(blobs), dtypes[0])
+        matrix = packed.reshape(len(blobs), -1).astype(np.float32)
+        return _normalize_rows(matrix)
+    return _embedding_matrix(
+        [_stored_embedding(b, d, j) for b, d, j in zip(blobs, dtypes, legacy)]
+    )
+
+
+def _quantize_rows(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization: each row is scaled so its largest
+    component maps to +/-127. Works block by block, so a memory-mapped matrix
+    is never widened into one large temporary.
+    """
+    n, dims = matrix.shape
+    codes = np.empty((n, dims), dtype=np.int8)
+    scales = np.empty(n, dtype=np.float32)
+    for start in range(0, n, QUANTIZED_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + QUANTIZED_BLOCK_ROWS], dtype=np.float32)
+        peak = np.abs(block).max(axis=1, initial=0.0)
+        scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        codes[start : start + len(block)] = np.rint(block / scale[:, None]).astype(np.int8)
+        scales[start : start + len(block)] = scale
+    return codes, scales
+
+
+def _quantize_embedding(values: np.ndarray | list[float]) -> tuple[bytes, float]:
+    codes, scales = _quantize_rows(_embedding_matrix([values]))
+    return codes[0].tobytes(), float(scales[0])
+
+
+def _code_matrix(codes: list[bytes], dims: int) -> np.ndarray:
+    """Stack stored int8 codes into one matrix, zero-padding shorter rows."""
+    if codes and all(len(c) == dims for c in codes):
+        return np.frombuffer(b"".join(codes), dtype=np.int8).reshape(len(codes), dims).copy()
+    matrix = np.zeros((len(codes), dims), dtype=np.int8)
+    for i, c in enumerate(codes):
+        matrix[i, : len(c)] = np.frombuffer(c, dtype=np.int8)
+    return matrix
+
+
+def _query_vector(values: np.ndarray | list[float], dims: int) -> np.ndarray:
+    vec = np.zeros(dims, dtype=np.float32)
+    size = min(dims, len(values))
+    if size:
+        vec[:size] = values[:size]
+    return vec
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first; ties keep row order."""
+    n = scores.shape[0]
+    k = min(max(1, k), n)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    order = np.lexsort((idx, -scores[idx]))
+    return idx[order]
+
+
+def _load_user_corpus(db: Session, user_id: uuid.UUID, version: int = 0) -> _UserCorpus:
+    """
+    Build a user's search structures. With shards enabled, full-precision rows
+    stay memory-mapped and only their int8 codes live on the heap; the shard is
+    written from user_knowledge_chunks when this version has none yet. Without
+    shards only the stored codes are read, and candidates are rescored from
+    embedding_vec at query time. Near-duplicate chunks are left out, so a
+    repeated passage is scanned and returned once, as its canonical chunk.
+    """
+    matrix = None
+    shard = embedding_shards.load_shard(user_id, version)
+    if shard is None and embedding_shards.enabled():
+        rows = (
+            db.query(
+                UserKnowledgeChunk.id,
+                UserKnowledgeChunk.embedding_vec,
+                UserKnowledgeChunk.embedding_dtype,
+                UserKnowledgeChunk.embedding,
+            )
+            .filter(
+                UserKnowledgeChunk.user_id == user_id,
+                UserKnowledgeChunk.duplicate_of_id.is_(None),
+            )
+            .order_by(UserKnowledgeChunk.created_at, UserKnowledgeChunk.chunk_index)
+            .all()
+        )
+        chunk_ids = [r[0] for r in rows]
+        full = _blob_matrix([r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows])
+        embedding_shards.write_shard(user_id, version, chunk_ids, full)
+        shard = embedding_shards.load_shard(user_id, version) or (chunk_ids, full)
+
+    if shard is not None:
+        chunk_ids, matrix = shard
+        codes, scales = _quantize_rows(matrix)
+        lexical = {
+            r[0]: r[1:]
+            for r in db.query(
+                UserKnowledgeChunk.id, UserKnowledgeChunk.token_count, UserKnowledgeChunk.term_postings
+            )
+            .filter(UserKnowledgeChunk.user_id == user_id)
+            .all()
+        }
+        token_counts = [lexical.get(cid, (0, None))[0] or 0 for cid in chunk_ids]
+        term_postings = [lexical.get(cid, (0, None))[1] for cid in chunk_ids]
+    else:
+        rows = (
+            db.query(
+                UserKnowledgeChunk.id,
+                UserKnowledgeChunk.embedding_q8,
+                UserKnowledgeChunk.embedding_scale,
+                UserKnowledgeChunk.token_count,
+                UserKnowledgeChunk.term_postings,
+            )
+            .filter(
+                UserKnowledgeChunk.user_id == user_id,
+                UserKnowledgeChunk.duplicate_of_id.is_(None),
+            )
+            .order_by(UserKnowledgeChunk.created_at, UserKnowledgeChunk.chunk_index)
+            .all()
+        )
+        chunk_ids = [r[0] for r in rows]
+        token_counts = [r[3] or 0 for r in rows]
+        term_postings = [r[4] for r in rows]
+        # Rows written before quantization, until init_db backfills them.
+        missing = [i for i, r in enumerate(rows) if r[1] is None]
+        pending = _quantize_rows(_exact_rows(db, chunk_ids, missing)) if missing else None
+        dims = max([len(r[1]) for r in rows if r[1] is not None] + [pending[0].shape[1] if pending else 0])
+        codes = _code_matrix([r[1] or b"" for r in rows], dims)
+        scales = np.asarray([r[2] or 1.0 for r in rows], dtype=np.float32)
+        if pending is not None:
+            codes[missing, : pending[0].shape[1]] = pending[0]
+            scales[missing] = pending[1]
+
+    return _UserCorpus(
+        chunk_ids=chunk_ids,
+        codes=codes,
+        scales=scales,
+        token_counts=np.asarray(token_counts, dtype=np.float32),
+        postings=Postings.from_packed(term_postings),
+        matrix=matrix,
+        version=version,
+    )
+
+
+def _exact_rows(db: Session, chunk_ids: list[uuid.UUID], rows: Iterable[int]) -> np.ndarray:
+    """Full-precision normalized embeddings for the given corpus rows, in order."""
+    wanted = [chunk_ids[i] for i in rows]
+    unique = list(dict.fromkeys(wanted))
+    stored = {}
+    for start in range(0, len(unique), EXACT_FETCH_BATCH):
+        batch = unique[start : start + EXACT_FETCH_BATCH]
+        stored.update(
+            (r[0], r[1:])
+            for r in db.query(
+                UserKnowledgeChunk.id,
+                UserKnowledgeChunk.embedding_vec,
+                UserKnowledgeChunk.embedding_dtype,
+                UserKnowledgeChunk.embedding,
+            )
+            .filter(UserKnowledgeChunk.id.in_(batch))
+            .all()
+        )
+    # A chunk deleted since the corpus was loaded scores as a zero vector.
+    found = [stored.get(cid, (None, None, None)) for cid in wanted]
+    return _blob_matrix([f[0] for f in found], [f[1] for f in found], [f[2] for f in found])
+
+
+def _approx_scores(corpus: _UserCorpus, queries: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every chunk from its int8 codes, for a (n_queries,
+    dims) matrix of queries. Returns shape (n_chunks, n_queries).
+    """
+    n = corpus.codes.shape[0]
+    scores = np.empty((n, queries.shape[0]), dtype=np.float32)
+    for start in range(0, n, QUANTIZED_BLOCK_ROWS):
+        block = corpus.codes[start : start + QUANTIZED_BLOCK_ROWS]
+        scores[start : start + len(block)] = block.astype(np.float32) @ queries.T
+    return scores * corpus.scales[:, None]
+
+
+def _lexical_scores(corpus: _UserCorpus, query_text: str) -> np.ndarray | None:
+    """BM25 scaled to [0, 1] by the best match, or None when nothing matches."""
+    lexical = bm25_scores(corpus.postings, corpus.token_counts, tokenize(query_text))
+    best = float(lexical.max()) if lexical.size else 0.0
+    return lexical / best if best > 0.0 else None
+
+
+def _fuse(vector: np.ndarray, lexical: np.ndarray | None, lexical_weight: float) -> np.ndarray:
+    if lexical is None:
+        return vector
+    return (1.0 - lexical_weight) * vector + lexical_weight * lexical
+
+
+def _rank_many(
+    db: Session,
+    corpus: _UserCorpus,
+    q_vecs: list[np.ndarray | list[float]],
+    query_texts: list[str],
+    top_k: int,
+    lexical_weights: list[float],
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    (corpus rows, fused scores) of the top_k chunks for each query, best
+    first. Hybrid scores for all queries come from one pass over the int8
+    codes; each query's best RESCORE_CANDIDATES are then rescored with
+    full-precision cosine similarity, fetching the union of candidates once.
+    """
+    dims = corpus.codes.shape[1]
+    queries = np.stack([_query_vector(v, dims) for v in q_vecs])
+    approx = _approx_scores(corpus, queries)
+    lexical = [_lexical_scores(corpus, text) for text in query_texts]
+    candidates = [
+        _top_k_indices(_fuse(approx[:, j], lexical[j], lexical_weights[j]), max(top_k, RESCORE_CANDIDATES))
+        for j in range(len(q_vecs))
+    ]
+
+    union = np.unique(np.concatenate(candidates))
+    if corpus.matrix is not None:
+        exact = np.asarray(corpus.matrix[union], dtype=np.float32)
+    else:
+        exact = _exact_rows(db, corpus.chunk_ids, union)
+    cosine = exact @ np.stack([_query_vector(v, exact.shape[1]) for v in q_vecs]).T
+
+    ranked: list[tuple[np.ndarray, np.ndarray]] = []
+    for j, rows in enumerate(candidates):
+        lex = lexical[j][rows] if lexical[j] is not None else None
+        scores = _fuse(cosine[np.searchsorted(union, rows), j], lex, lexical_weights[j])
+        order = _top_k_indices(scores, top_k)
+        ranked.append((rows[order], scores[order]))
+    return ranked
+
+
+def _rank(
+    db: Session,
+    corpus: _UserCorpus,
+    q_vec: list[float],
+    query_text: str,
+    top_k: int,
+    lexical_weight: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    return _rank_many(db, corpus, [q_vec], [query_text], top_k, [lexical_weight])[0]
+
+
+def _corpus_version(db: Session, user_id: uuid.UUID) -> int:
+    version = db.query(User.knowledge_version).filter(User.id == user_id).scalar()
+    return version or 0
+
+
+def _bump_corpus_versions(db: Session, user_ids: Iterable[uuid.UUID]) -> None:
+    ids = list(set(user_ids))
+    if ids:
+        db.query(User).filter(User.id.in_(ids)).update(
+            {User.knowledge_version: func.coalesce(User.knowledge_version, 0) + 1},
+            synchronize_session=False,
+        )
+
+
+def _get_user_corpus(db: Session, user_id: uuid.UUID, version: int = 0) -> _UserCorpus:
+    corpus = _corpus_cache.get(user_id)
+    if corpus is None or corpus.version != version:
+        corpus = _load_user_corpus(db, user_id, version)
+        _corpus_cache.set(user_id, corpus)
+    return corpus
+
+
+def _invalidate_user_corpus(user_id: uuid.UUID) -> None:
+    _corpus_cache.pop(user_id)
+
+
+def _refresh_user_corpus(db: Session, user_id: uuid.UUID) -> None:
+    """After a committed change: drop the cached corpus and rebuild the shard."""
+    _invalidate_user_corpus(user_id)
+    if not embedding_shards.enabled():
+        return
     try:
-        values = emb.embed_query(text)
-        if not isinstance(values, list) or not values:
-            return _fallback_embedding(text)
-        norm = math.sqrt(sum(float(v) * float(v) for v in values)) or 1.0
-        return [float(v) / norm for v in values]
-    except Exception:
-        return _fallback_embedding(text)
+        _get_user_corpus(db, user_id, _corpus_version(db, user_id))
+    except SQLAlchemyError:
+        # The change is committed; the shard is rebuilt on the next retrieval.
+        db.rollback()
 
 
-def _cosine_similarity(a: list[float], b: list[float]) -> float:
-    if not a or not b:
-        return 0.0
-    size = min(len(a), len(b))
-    if size == 0:
-        return 0.0
-    return sum(a[i] * b[i] for i in range(size))
+def _chunk_metadata(doc: UserKnowledgeDocument) -> dict[str, Any]:
+    return {"title": doc.title, "source_type": doc.source_type}
+
+
+def _load_duplicate_index(db: Session, user_id: uuid.UUID) -> minhash.LSHIndex:
+    """LSH index over the signatures of a user's canonical chunks."""
+    index = minhash.LSHIndex(DUPLICATE_THRESHOLD)
+    rows = (
+        db.query(UserKnowledgeChunk.id, UserKnowledgeChunk.minhash)
+        .filter(
+            UserKnowledgeChunk.user_id == user_id,
+            UserKnowledgeChunk.duplicate_of_id.is_(None),
+            UserKnowledgeChunk.minhash.isnot(None),
+        )
+        .all()
+    )
+    for chunk_id, blob in rows:
+        index.add(chunk_id, minhash.from_bytes(blob))
+    return index
+
+
+def _insert_chunks(
+    db: Session,
+    doc: UserKnowledgeDocument,
+    indexed_chunks: Iterable[tuple[int, str]],
+    total: int | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    duplicates: minhash.LSHIndex | None = None,
+) -> int:
+    """
+    Embed and insert chunks of doc, with their lexical index postings.
+    Chunks are consumed lazily in fixed-size groups (one group = the embedding
+    batches that run concurrently) and each group is flushed before the next
+    is read, so memory stays flat however long the document is. on_progress
+    is called with (chunks inserted, total) after every group.
+
+    With a duplicates index, a chunk that nearly matches an indexed one is
+    stored with duplicate_of_id and no embedding or postings of its own, and
+    every new canonical chunk is added to the index.
+    """
+    group_size = max(1, EMBED_BATCH_SIZE) * max(1, EMBED_MAX_CONCURRENCY)
+    metadata = _chunk_metadata(doc)
+    chunks = iter(indexed_chunks)
+    inserted = 0
+    while True:
+        group = list(itertools.islice(chunks, group_size))
+        if not group:
+            break
+        planned: list[tuple[int, str, uuid.UUID, np.ndarray | None, uuid.UUID | None]] = []
+        for idx, chunk in group:
+            chunk_id = uuid.uuid4()
+            sig = minhash.signature(chunk)
+            original = None
+            if duplicates is not None and sig is not None:
+                original = duplicates.find(sig)
+                if original is None:
+                    duplicates.add(chunk_id, sig)
+            planned.append((idx, chunk, chunk_id, sig, original))
+        embeddings = iter(_embed_documents([p[1] for p in planned if p[4] is None]))
+
+        rows: list[UserKnowledgeChunk] = []
+        for idx, chunk, chunk_id, sig, original in planned:
+            counts, token_count = term_frequencies(chunk)
+            row = UserKnowledgeChunk(
+                id=chunk_id,
+                document_id=doc.id,
+                user_id=doc.user_id,
+                chunk_index=idx,
+                text=chunk,
+                text_hash=embedding_cache.text_hash(chunk),
+                metadata_json=metadata,
+                minhash=minhash.to_bytes(sig) if sig is not None else None,
+                duplicate_of_id=original,
+                token_count=token_count,
+            )
+            if original is None:
+                embedding, model_name = next(embeddings)
+                row.embedding_vec = embedding_cache.pack_embedding(embedding, EMBEDDING_DTYPE)
+                row.embedding_dim = len(embedding)
+                row.embedding_dtype = EMBEDDING_DTYPE
+                row.embedding_model = model_name
+                row.embedding_q8, row.embedding_scale = _quantize_embedding(embedding)
+                row.term_postings = pack_postings(counts)
+            rows.append(row)
+        # Canonical rows precede their duplicates, so the self-reference holds.
+        db.bulk_save_objects(rows)
+        db.flush()
+        inserted += len(rows)
+        if on_progress is not None:
+            on_progress(inserted, total if total is not None else inserted)
+    return inserted
+
+
+def _promote_duplicates(db: Session, doomed_ids: list[uuid.UUID]) -> None:
+    """
+    Before deleting chunks, hand each one's embedding and postings to the
+    first of its surviving duplicates and point the other duplicates there.
+    """
+    if not doomed_ids:
+        return
+    doomed = set(doomed_ids)
+    survivors = [
+        row
+        for row in db.query(UserKnowledgeChunk)
+        .filter(UserKnowledgeChunk.duplicate_of_id.in_(doomed_ids))
+        .order_by(UserKnowledgeChunk.created_at, UserKnowledgeChunk.chunk_index)
+        .all()
+        if row.id not in doomed
+    ]
+    if not survivors:
+        return
+    originals = {
+        row.id: row
+        for row in db.query(UserKnowledgeChunk)
+        .filter(UserKnowledgeChunk.id.in_({row.duplicate_of_id for row in survivors}))
+        .all()
+    }
+    heirs: dict[uuid.UUID, UserKnowledgeChunk] = {}
+    for row in survivors:
+        heir = heirs.get(row.duplicate_of_id)
+        if heir is not None:
+            row.duplicate_of_id = heir.id
+            continue
+        source = originals[row.duplicate_of_id]
+        heirs[source.id] = row
+        row.duplicate_of_id = None
+        row.embedding_vec = source.embedding_vec
+        row.embedding_dim = source.embedding_dim
+        row.embedding_dtype = source.embedding_dtype
+        row.embedding_model = source.embedding_model
+        row.embedding_q8 = source.embedding_q8
+        row.embedding_scale = source.embedding_scale
+        row.embedding = source.embedding
+        counts, row.token_count = term_frequencies(row.text)
+        row.term_postings = pack_postings(counts)
+    db.flush()
 
 
 def ingest_user_knowledge(
@@ -65,7 +757,12 @@ def ingest_user_knowledge(
     title: str,
     content: str,
     source_type: str = "note",
+    on_progress: Callable[[int, int], None] | None = None,
 ) -> tuple[UserKnowledgeDocument, int]:
+    """
+    Store a document and its embedded chunks. Everything is committed in one
+    transaction, so the document only becomes retrievable once fully ingested.
+    """
     try:
         doc = UserKnowledgeDocument(
             user_id=user_id,
@@ -76,24 +773,24 @@ def ingest_user_knowledge(
         db.add(doc)
         db.flush()
 
-        chunks = _chunk_text(content)
-        rows: list[UserKnowledgeChunk] = []
-        for idx, chunk in enumerate(chunks):
-            rows.append(
-                UserKnowledgeChunk(
-                    document_id=doc.id,
-                    user_id=user_id,
-                    chunk_index=idx,
-                    text=chunk,
-                    metadata_json={"title": doc.title, "source_type": doc.source_type},
-                    embedding=_embed_text(chunk),
-                )
-            )
-        if rows:
-            db.bulk_save_objects(rows)
+        total = None
+        if on_progress is not None:
+            # A counting pass is cheap and lets progress report a real total.
+            total = sum(1 for _ in _iter_chunks(content))
+            on_progress(0, total)
+        inserted = _insert_chunks(
+            db,
+            doc,
+            enumerate(_iter_chunks(content)),
+            total,
+            on_progress,
+            duplicates=_load_duplicate_index(db, user_id),
+        )
+        _bump_corpus_versions(db, [user_id])
         db.commit()
+        _refresh_user_corpus(db, user_id)
         db.refresh(doc)
-        return doc, len(rows)
+        return doc, inserted
     except SQLAlchemyError as exc:
         db.rollback()
         raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
@@ -105,67 +802,196 @@ def retrieve_relevant_chunks(
     query_text: str,
     top_k: int = 8,
 ) -> list[dict[str, Any]]:
-    q_vec = _embed_text(query_text)
+    """
+    The top_k chunks for query_text. Results are cached per (user, query,
+    top_k, corpus version), so a repeat query against unchanged knowledge
+    costs one version lookup and no embedding call.
+    """
+    return retrieve_relevant_chunks_batch(db, user_id, [query_text], top_k)[0]
+
+
+def retrieve_relevant_chunks_batch(
+    db: Session,
+    user_id: uuid.UUID,
+    query_texts: list[str],
+    top_k: int = 8,
+) -> list[list[dict[str, Any]]]:
+    """
+    The top_k chunks for each of query_texts, in the same order. Uncached
+    queries share one embedding call, one scan of the corpus and one fetch
+    of the winning chunk rows.
+    """
     try:
-        chunks = (
-            db.query(UserKnowledgeChunk).filter(UserKnowledgeChunk.user_id == user_id).all()
-        )
+        version = _corpus_version(db, user_id)
     except SQLAlchemyError as exc:
         raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
-    scored: list[tuple[float, UserKnowledgeChunk]] = []
-    for c in chunks:
-        emb = c.embedding if isinstance(c.embedding, list) else []
-        score = _cosine_similarity(q_vec, [float(v) for v in emb]) if emb else 0.0
-        scored.append((score, c))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    out: list[dict[str, Any]] = []
-    for score, c in scored[:max(1, top_k)]:
-        out.append(
-            {
-                "chunkId": str(c.id),
-                "documentId": str(c.document_id),
-                "chunkIndex": c.chunk_index,
-                "score": round(float(score), 5),
-                "text": c.text,
-                "metadata": c.metadata_json or {},
-            }
-        )
-    return out
+    keys = [(user_id, embedding_cache.text_hash(q), top_k, version) for q in query_texts]
+    results: list[list[dict[str, Any]] | None] = [_result_cache.get(key) for key in keys]
+    pending = list(dict.fromkeys(q for q, r in zip(query_texts, results) if r is None))
+
+    if pending:
+        embedded = _embed_queries(pending)
+        # Fallback vectors are expected without a model; with one they mean
+        # the embeddings call failed, and results should not outlive that.
+        degraded = {q for q, (_, from_model) in zip(pending, embedded) if not from_model}
+        if degraded and get_embeddings_model() is None:
+            degraded = set()
+        try:
+            corpus = _get_user_corpus(db, user_id, version)
+            if corpus.chunk_ids:
+                ranked = _rank_many(
+                    db,
+                    corpus,
+                    [vec for vec, _ in embedded],
+                    pending,
+                    top_k,
+                    [LEXICAL_WEIGHT if from_model else FALLBACK_LEXICAL_WEIGHT for _, from_model in embedded],
+                )
+                top_ids = {corpus.chunk_ids[i] for rows, _ in ranked for i in rows}
+                rows = db.query(UserKnowledgeChunk).filter(UserKnowledgeChunk.id.in_(top_ids)).all()
+            else:
+                ranked = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))] * len(pending)
+                rows = []
+        except SQLAlchemyError as exc:
+            raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+
+        by_id = {c.id: c for c in rows}
+        fresh: dict[str, list[dict[str, Any]]] = {}
+        for query_text, (top, scores) in zip(pending, ranked):
+            out: list[dict[str, Any]] = []
+            for i, score in zip(top, scores):
+                c = by_id.get(corpus.chunk_ids[i])
+                if c is None:
+                    continue
+                out.append(
+                    {
+                        "chunkId": str(c.id),
+                        "documentId": str(c.document_id),
+                        "chunkIndex": c.chunk_index,
+                        "score": round(float(score), 5),
+                        "text": c.text,
+                        "metadata": c.metadata_json or {},
+                    }
+                )
+            fresh[query_text] = out
+            if query_text not in degraded:
+                _result_cache.set((user_id, embedding_cache.text_hash(query_text), top_k, version), out)
+        results = [r if r is not None else fresh[q] for q, r in zip(query_texts, results)]
+
+    return [[dict(r) for r in result] for result in results]
+
+
+def _encode_cursor(created_at: datetime, doc_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
 
 
-def list_user_knowledge_documents(db: Session, user_id: uuid.UUID) -> list[dict[str, Any]]:
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Raises ValueError for anything that is not a cursor from _encode_cursor."""
     try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, doc_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(doc_id)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def _chunk_count_subquery():
+    return (
+        select(func.count(UserKnowledgeChunk.id))
+        .where(UserKnowledgeChunk.document_id == UserKnowledgeDocument.id)
+        .correlate(UserKnowledgeDocument)
+        .scalar_subquery()
+    )
+
+
+def list_user_knowledge_documents(
+    db: Session,
+    user_id: uuid.UUID,
+    limit: int = 50,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """
+    One page of a user's documents, newest first, with chunk counts from the
+    same query. Pass the returned nextCursor back to fetch the following page.
+    """
+    limit = min(max(1, limit), MAX_PAGE_SIZE)
+    after = _decode_cursor(cursor) if cursor else None
+    try:
+        query = db.query(
+            UserKnowledgeDocument.id,
+            UserKnowledgeDocument.title,
+            UserKnowledgeDocument.source_type,
+            UserKnowledgeDocument.created_at,
+            _chunk_count_subquery().label("chunk_count"),
+        ).filter(UserKnowledgeDocument.user_id == user_id)
+        if after is not None:
+            query = query.filter(
+                tuple_(UserKnowledgeDocument.created_at, UserKnowledgeDocument.id) < tuple_(*after)
+            )
         docs = (
-            db.query(UserKnowledgeDocument)
-            .filter(UserKnowledgeDocument.user_id == user_id)
-            .order_by(UserKnowledgeDocument.created_at.desc())
+            query.order_by(UserKnowledgeDocument.created_at.desc(), UserKnowledgeDocument.id.desc())
+            .limit(limit + 1)
             .all()
         )
-        counts: dict[str, int] = {}
-        for d in docs:
-            counts[str(d.id)] = (
-                db.query(UserKnowledgeChunk)
-                .filter(UserKnowledgeChunk.document_id == d.id)
-                .count()
-            )
+    except SQLAlchemyError as exc:
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
 
-        return [
+    page = docs[:limit]
+    next_cursor = None
+    if len(docs) > limit and page[-1].created_at is not None:
+        next_cursor = _encode_cursor(page[-1].created_at, page[-1].id)
+    return {
+        "items": [
             {
                 "id": str(d.id),
                 "title": d.title,
                 "sourceType": d.source_type,
-                "chunkCount": counts.get(str(d.id), 0),
+                "chunkCount": d.chunk_count or 0,
+                "createdAt": d.created_at.isoformat() if d.created_at else None,
             }
-            for d in docs
-        ]
-    except SQLAlchemyError as exc:
-        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+            for d in page
+        ],
+        "nextCursor": next_cursor,
+    }
 
 
-def get_user_knowledge_document(
-    db: Session, user_id: uuid.UUID, doc_id: str | uuid.UUID
-) -> dict[str, Any] | None:
+def _match_chunks(
+    existing: list[UserKnowledgeChunk], chunks: Iterable[str]
+) -> tuple[list[tuple[int, UserKnowledgeChunk]], list[tuple[int, str]], list[uuid.UUID]]:
+    """
+    Pair new chunk texts with existing rows by text hash.
+    Returns (kept (new index, row), added (new index, text), stale row ids).
+    """
+    by_hash: dict[str, list[UserKnowledgeChunk]] = {}
+    for row in existing:
+        key = row.text_hash or embedding_cache.text_hash(row.text)
+        by_hash.setdefault(key, []).append(row)
+
+    kept: list[tuple[int, UserKnowledgeChunk]] = []
+    added: list[tuple[int, str]] = []
+    for idx, chunk in enumerate(chunks):
+        matches = by_hash.get(embedding_cache.text_hash(chunk))
+        if matches:
+            kept.append((idx, matches.pop(0)))
+        else:
+            added.append((idx, chunk))
+    stale = [row.id for rows in by_hash.values() for row in rows]
+    return kept, added, stale
+
+
+def update_user_knowledge_document(
+    db: Session,
+    user_id: uuid.UUID,
+    doc_id: str | uuid.UUID,
+    title: str,
+    content: str,
+    source_type: str = "note",
+) -> tuple[UserKnowledgeDocument, dict[str, int]] | None:
+    """
+    Replace a document's content, re-embedding only chunks whose text is new.
+    Existing chunks are matched by text hash and moved to their new chunk_index.
+    """
     try:
         parsed_doc_id = doc_id if isinstance(doc_id, uuid.UUID) else uuid.UUID(str(doc_id))
     except (ValueError, TypeError):
@@ -182,21 +1008,111 @@ def get_user_knowledge_document(
         )
         if doc is None:
             return None
+        doc.title = (title or "Untitled").strip()[:256] or "Untitled"
+        doc.source_type = (source_type or "note").strip()[:64] or "note"
+        doc.content = content or ""
 
-        chunk_count = (
+        existing = (
             db.query(UserKnowledgeChunk)
             .filter(UserKnowledgeChunk.document_id == doc.id)
-            .count()
+            .order_by(UserKnowledgeChunk.chunk_index)
+            .all()
         )
-        return {
-            "id": str(doc.id),
-            "title": doc.title,
-            "sourceType": doc.source_type,
-            "content": doc.content,
-            "chunkCount": chunk_count,
+        kept, added, stale = _match_chunks(existing, _iter_chunks(content))
+
+        if stale:
+            _promote_duplicates(db, stale)
+            db.query(UserKnowledgeChunk).filter(UserKnowledgeChunk.id.in_(stale)).delete(
+                synchronize_session=False
+            )
+        # Park kept rows on negative indexes first so renumbering them can
+        # never collide with another row on uq_document_chunk_idx.
+        for _, row in kept:
+            row.chunk_index = -(row.chunk_index + 1)
+        db.flush()
+        metadata = _chunk_metadata(doc)
+        for idx, row in kept:
+            row.chunk_index = idx
+            row.text_hash = row.text_hash or embedding_cache.text_hash(row.text)
+            row.metadata_json = metadata
+        db.flush()
+
+        _insert_chunks(db, doc, added, duplicates=_load_duplicate_index(db, user_id))
+        _bump_corpus_versions(db, [user_id])
+        db.commit()
+        _refresh_user_corpus(db, user_id)
+        db.refresh(doc)
+        return doc, {
+            "chunkCount": len(kept) + len(added),
+            "reusedChunks": len(kept),
+            "embeddedChunks": len(added),
+            "removedChunks": len(stale),
         }
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+
+
+def get_user_knowledge_document(
+    db: Session,
+    user_id: uuid.UUID,
+    doc_id: str | uuid.UUID,
+    include_content: bool = True,
+    content_offset: int = 0,
+    content_limit: int | None = None,
+) -> dict[str, Any] | None:
+    """
+    A single document. Content can be left out, or limited to the characters
+    [content_offset, content_offset + content_limit); the slice is taken in
+    SQL so the rest never leaves the database.
+    """
+    try:
+        parsed_doc_id = doc_id if isinstance(doc_id, uuid.UUID) else uuid.UUID(str(doc_id))
+    except (ValueError, TypeError):
+        return None
+
+    columns = [
+        UserKnowledgeDocument.id,
+        UserKnowledgeDocument.title,
+        UserKnowledgeDocument.source_type,
+        func.length(UserKnowledgeDocument.content).label("content_length"),
+        _chunk_count_subquery().label("chunk_count"),
+    ]
+    offset = max(0, content_offset)
+    if include_content:
+        if offset or content_limit is not None:
+            # SQL substr is 1-based.
+            length = max(0, content_limit) if content_limit is not None else None
+            args = [UserKnowledgeDocument.content, offset + 1] + ([length] if length is not None else [])
+            columns.append(func.substr(*args).label("content"))
+        else:
+            columns.append(UserKnowledgeDocument.content.label("content"))
+
+    try:
+        doc = (
+            db.query(*columns)
+            .filter(
+                UserKnowledgeDocument.id == parsed_doc_id,
+                UserKnowledgeDocument.user_id == user_id,
+            )
+            .first()
+        )
     except SQLAlchemyError as exc:
         raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    if doc is None:
+        return None
+
+    out = {
+        "id": str(doc.id),
+        "title": doc.title,
+        "sourceType": doc.source_type,
+        "chunkCount": doc.chunk_count or 0,
+        "contentLength": doc.content_length or 0,
+    }
+    if include_content:
+        out["content"] = doc.content or ""
+        out["contentOffset"] = offset
+    return out
 
 
 def delete_user_knowledge_document(
@@ -219,10 +1135,152 @@ def delete_user_knowledge_document(
         if doc is None:
             return False
 
+        doomed = [
+            chunk_id
+            for (chunk_id,) in db.query(UserKnowledgeChunk.id)
+            .filter(UserKnowledgeChunk.document_id == doc.id)
+            .all()
+        ]
+        _promote_duplicates(db, doomed)
         db.query(UserKnowledgeChunk).filter(UserKnowledgeChunk.document_id == doc.id).delete()
         db.delete(doc)
+        _bump_corpus_versions(db, [user_id])
         db.commit()
+        _refresh_user_corpus(db, user_id)
         return True
     except SQLAlchemyError as exc:
         db.rollback()
         raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+
+
+def backfill_lexical_index(db: Session, batch_size: int = 500) -> int:
+    """Index chunks stored before the lexical index existed; returns chunks indexed."""
+    indexed = 0
+    touched: set[uuid.UUID] = set()
+    try:
+        while True:
+            chunks = (
+                db.query(UserKnowledgeChunk)
+                .filter(
+                    UserKnowledgeChunk.term_postings.is_(None),
+                    UserKnowledgeChunk.duplicate_of_id.is_(None),
+                )
+                .limit(batch_size)
+                .all()
+            )
+            if not chunks:
+                break
+            for chunk in chunks:
+                counts, chunk.token_count = term_frequencies(chunk.text)
+                chunk.term_postings = pack_postings(counts)
+                touched.add(chunk.user_id)
+            _bump_corpus_versions(db, (c.user_id for c in chunks))
+            db.commit()
+            indexed += len(chunks)
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    for user_id in touched:
+        _invalidate_user_corpus(user_id)
+    return indexed
+
+
+def migrate_embeddings_to_binary(db: Session, batch_size: int = 500) -> int:
+    """Pack legacy JSON embeddings into embedding_vec; returns rows converted."""
+    converted = 0
+    touched: set[uuid.UUID] = set()
+    try:
+        while True:
+            chunks = (
+                db.query(UserKnowledgeChunk)
+                .filter(
+                    UserKnowledgeChunk.embedding_vec.is_(None),
+                    UserKnowledgeChunk.embedding.isnot(None),
+                )
+                .limit(batch_size)
+                .all()
+            )
+            if not chunks:
+                break
+            for chunk in chunks:
+                values = _normalize_embedding(chunk.embedding) or []
+                chunk.embedding_vec = embedding_cache.pack_embedding(values, EMBEDDING_DTYPE)
+                chunk.embedding_dim = len(values)
+                chunk.embedding_dtype = EMBEDDING_DTYPE
+                # Old rows did not record their model; 64 dims means the fallback.
+                chunk.embedding_model = (
+                    FALLBACK_EMBEDDING_MODEL if len(values) == 64 else get_embedding_model_name()
+                )
+                chunk.embedding = None
+                touched.add(chunk.user_id)
+            _bump_corpus_versions(db, (c.user_id for c in chunks))
+            db.commit()
+            converted += len(chunks)
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    for user_id in touched:
+        _invalidate_user_corpus(user_id)
+    return converted
+
+
+def backfill_quantized_embeddings(db: Session, batch_size: int = 500) -> int:
+    """Fill embedding_q8 for chunks stored before quantization; returns rows filled."""
+    filled = 0
+    touched: set[uuid.UUID] = set()
+    try:
+        while True:
+            chunks = (
+                db.query(UserKnowledgeChunk)
+                .filter(
+                    UserKnowledgeChunk.embedding_q8.is_(None),
+                    UserKnowledgeChunk.embedding_vec.isnot(None),
+                )
+                .limit(batch_size)
+                .all()
+            )
+            if not chunks:
+                break
+            for chunk in chunks:
+                values = embedding_cache.unpack_embedding(chunk.embedding_vec, chunk.embedding_dtype)
+                chunk.embedding_q8, chunk.embedding_scale = _quantize_embedding(values)
+                touched.add(chunk.user_id)
+            _bump_corpus_versions(db, (c.user_id for c in chunks))
+            db.commit()
+            filled += len(chunks)
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    for user_id in touched:
+        _invalidate_user_corpus(user_id)
+    return filled
+
+
+def backfill_minhash_signatures(db: Session, batch_size: int = 500) -> int:
+    """
+    Sign chunks stored before near-duplicate detection, so new chunks can be
+    matched against them. Existing chunks are not merged. Chunks without words
+    have no signature and stay NULL, so the scan walks ids instead of looping
+    until none are left. Returns rows signed.
+    """
+    signed = 0
+    last_id = None
+    try:
+        while True:
+            query = db.query(UserKnowledgeChunk).filter(UserKnowledgeChunk.minhash.is_(None))
+            if last_id is not None:
+                query = query.filter(UserKnowledgeChunk.id > last_id)
+            chunks = query.order_by(UserKnowledgeChunk.id).limit(batch_size).all()
+            if not chunks:
+                break
+            for chunk in chunks:
+                sig = minhash.signature(chunk.text)
+                if sig is not None:
+                    chunk.minhash = minhash.to_bytes(sig)
+                    signed += 1
+            last_id = chunks[-1].id
+            db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        raise KnowledgeStoreUnavailableError("knowledge store unavailable") from exc
+    return signed
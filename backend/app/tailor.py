@@ -1,12 +1,47 @@
 from app.models import Resume, Job, Suggestion
-from app.prompts import tailor_prompts, tailor_schema_examples
-from app.llm import get_model, parse_json
-from app.rag import retrieve_relevant_chunks, KnowledgeStoreUnavailableError
+from app.prompts import tailor_prompts, tailor_schema_examples, tailor_combined, tailor_combined_schema_example
+from app.llm import get_model, get_model_name, parse_json
+from app.rag import retrieve_relevant_chunks_batch, KnowledgeStoreUnavailableError
+from app import prompt_budget, tailor_cache
+import asyncio
 import json
+import logging
+import os
 import uuid
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
 from sqlalchemy.orm import Session
 
 
+logger = logging.getLogger(__name__)
+
+SECTION_KEYS = [ "languages", "technologies", "experience" ]
+
+# Seconds each section prompt may take before its suggestions are dropped.
+TAILOR_SECTION_TIMEOUT = float(os.environ.get("TAILOR_SECTION_TIMEOUT", "60"))
+# Default for the single-prompt mode; callers can still opt in per request.
+TAILOR_COMBINED = os.environ.get("TAILOR_COMBINED", "").strip().lower() in ("1", "true", "yes")
+# Model calls in flight at once across every tailoring request in the process.
+TAILOR_MAX_CONCURRENCY = int(os.environ.get("TAILOR_MAX_CONCURRENCY", "8"))
+# Jobs accepted by one batch request.
+TAILOR_BATCH_MAX_JOBS = int(os.environ.get("TAILOR_BATCH_MAX_JOBS", "25"))
+
+# asyncio semaphores belong to one event loop, and the sync wrappers start a
+# fresh loop per call, so keep one per loop.
+_llm_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+# Retrieval query focus for each tailored section; the job posting is appended.
+_SECTION_QUERIES = {
+    "languages": "Find resume evidence of programming languages the user has worked with.",
+    "technologies": "Find resume evidence of frameworks, tools, databases and platforms the user has used.",
+    "experience": "Find resume evidence of accomplishments and responsibilities for experience bullets.",
+}
+
+
 def _format_evidence(chunks: list[dict]) -> str:
     if not chunks:
         return ""
@@ -21,91 +56,366 @@ def _format_evidence(chunks: list[dict]) -> str:
 
 
 def tailor_resume( resume: Resume, job: Job ) -> list[Suggestion]:
-    return _tailor_resume_core(resume=resume, job=job, evidence_chunks=None)
+    return _tailor_resume_core(resume=resume, job=job, section_evidence=None)
 
 
-def _tailor_resume_core(
+@dataclass(frozen=True)
+class _SerializedResume:
+    """The resume as prompts and cache keys see it, computed once per request."""
+
+    resume: Resume
+    text: str
+    data: dict[str, Any]
+
+    @classmethod
+    def of(cls, resume: Resume) -> "_SerializedResume":
+        return cls(resume=resume, text=resume.to_string(), data=resume.model_dump(mode="json"))
+
+
+async def _ainvoke(model: Any, message: list[tuple[str, str]]) -> Any:
+    """model.ainvoke under the process-wide TAILOR_MAX_CONCURRENCY cap.
+    The timeout starts once a slot is free, so queueing never times a call out."""
+    loop = asyncio.get_running_loop()
+    slots = _llm_slots.get(loop)
+    if slots is None:
+        slots = _llm_slots[loop] = asyncio.Semaphore(TAILOR_MAX_CONCURRENCY)
+    async with slots:
+        return await asyncio.wait_for(model.ainvoke(message), timeout=TAILOR_SECTION_TIMEOUT)
+
+
+def _grounding_instruction(evidence_chunks: list[dict]) -> str:
+    if not evidence_chunks:
+        return ""
+    return (
+        "\nIMPORTANT grounding rules:\n"
+        "- Only propose edits grounded in either the parsed resume or retrieved evidence.\n"
+        "- If you cannot ground a claim, return no suggestion.\n"
+        + _format_evidence(evidence_chunks)
+    )
+
+
+def _section_prompt(
+    resume_text: str,
+    job_description: str,
+    i: int,
+    evidence_chunks: list[dict] | None,
+) -> prompt_budget.AssembledPrompt:
+    output_instructions = (
+        "IMPORTANT: Do NOT force yourself to create suggestions by fabricating information. It is ok to return an empty list. Reply with valid JSON only and nothing else. Do NOT include any explanatory text, markdown, or backticks. The JSON must match the schema example below exactly (use the same keys):\n"
+        + json.dumps(tailor_schema_examples[i], indent=2)
+    )
+
+    resume_instruction = "Here is the parsed resume you can use to contextualize your edits: \n" + resume_text
+
+    return prompt_budget.assemble(
+        tailor_prompts[i] + output_instructions,
+        resume_instruction,
+        evidence_chunks or [],
+        _grounding_instruction,
+        job_description,
+    )
+
+
+def _to_suggestions(section: str, parsed: Any) -> list[Suggestion]:
+    suggestions: list[Suggestion] = []
+    if parsed is None:
+        return suggestions
+    for suggestion in parsed:
+        # Convert string indices to integers if present (LLM may return strings)
+        entry_idx = suggestion.get("entryIdx")
+        entry_idx_int = None
+        if entry_idx is not None and entry_idx != "":
+            try:
+                entry_idx_int = int(entry_idx)
+            except (ValueError, TypeError):
+                entry_idx_int = None
+
+        bullet_idx = suggestion.get("bulletIdx")
+        bullet_idx_int = None
+        if bullet_idx is not None and bullet_idx != "":
+            try:
+                bullet_idx_int = int(bullet_idx)
+            except (ValueError, TypeError):
+                bullet_idx_int = None
+
+        s = Suggestion(
+            section=section,
+            entryIdx=entry_idx_int,
+            bulletIdx=bullet_idx_int,
+            original=suggestion["original"],
+            updated=suggestion["updated"],
+            explanation=suggestion["explanation"]
+        )
+
+        suggestions.append( s )
+    return suggestions
+
+
+async def _atailor_section(
+    model: Any,
+    resume_text: str,
+    job_description: str,
+    i: int,
+    evidence_chunks: list[dict] | None,
+    usage: dict[str, Any] | None = None,
+) -> list[Suggestion] | None:
+    """One section prompt; None if it exceeds TAILOR_SECTION_TIMEOUT. The
+    prompt's token report is stored under the section key in usage."""
+    prompt = _section_prompt(resume_text, job_description, i, evidence_chunks)
+    if usage is not None:
+        usage[SECTION_KEYS[i]] = prompt.report()
+    try:
+        res = await _ainvoke(model, prompt.messages)
+    except asyncio.TimeoutError:
+        return None
+
+    raw = getattr( res, "text", str(res) )
+
+    return _to_suggestions(SECTION_KEYS[i], parse_json(raw))
+
+
+def _combined_prompt(
+    resume_text: str,
+    job_description: str,
+    sections: list[str],
+    section_evidence: dict[str, list[dict]] | None,
+) -> prompt_budget.AssembledPrompt:
+    output_instructions = (
+        "\nIMPORTANT: Do NOT force yourself to create suggestions by fabricating information. Empty arrays are fine. "
+        "Reply with valid JSON only and nothing else. Do NOT include any explanatory text, markdown, or backticks. "
+        "The JSON must match the schema example below exactly (use the same keys):\n"
+        + json.dumps(tailor_combined_schema_example, indent=2)
+    )
+    skipped = [key for key in SECTION_KEYS if key not in sections]
+    if skipped:
+        output_instructions += "\nThe resume has no " + ", ".join(skipped) + " section; return an empty array for it."
+
+    resume_instruction = "\nHere is the parsed resume you can use to contextualize your edits: \n" + resume_text
+    # Sections often retrieve the same chunks; list each one once.
+    evidence_chunks = list(
+        {c.get("chunkId"): c for key in sections for c in (section_evidence or {}).get(key) or []}.values()
+    )
+
+    return prompt_budget.assemble(
+        tailor_combined + output_instructions,
+        resume_instruction,
+        evidence_chunks,
+        _grounding_instruction,
+        job_description,
+    )
+
+
+async def _atailor_combined(
+    model: Any,
+    resume_text: str,
+    job_description: str,
+    sections: list[str],
+    section_evidence: dict[str, list[dict]] | None,
+    usage: dict[str, Any] | None = None,
+) -> list[Suggestion] | None:
+    """All sections from one prompt, or None if the reply is late or unusable.
+    The prompt's token report is stored under "combined" in usage."""
+    prompt = _combined_prompt(resume_text, job_description, sections, section_evidence)
+    if usage is not None:
+        usage["combined"] = prompt.report()
+    try:
+        res = await _ainvoke(model, prompt.messages)
+    except asyncio.TimeoutError:
+        return None
+
+    parsed = parse_json(getattr( res, "text", str(res) ))
+    if not isinstance(parsed, dict) or not all(isinstance(parsed.get(key), list) for key in sections):
+        return None
+    try:
+        return [s for key in sections for s in _to_suggestions(key, parsed[key])]
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+
+
+def _cache_key(
+    serialized: _SerializedResume,
+    job_description: str,
+    section_evidence: dict[str, list[dict]] | None,
+    mode: str,
+) -> str:
+    return tailor_cache.cache_key(
+        serialized.data,
+        job_description,
+        {key: [str(c.get("chunkId", "")) for c in chunks] for key, chunks in (section_evidence or {}).items()},
+        get_model_name(),
+        mode,
+    )
+
+
+async def _cached_suggestions(key: str) -> list[Suggestion] | None:
+    cached = await asyncio.to_thread(tailor_cache.get, key)
+    if cached is None:
+        return None
+    try:
+        return [Suggestion(**s) for s in cached]
+    except (TypeError, ValueError):
+        return None
+
+
+async def _store_suggestions(key: str, suggestions: list[Suggestion]) -> None:
+    await asyncio.to_thread(tailor_cache.put, key, [s.model_dump() for s in suggestions])
+
+
+async def _atailor_resume_core(
     resume: Resume,
     job: Job,
-    evidence_chunks: list[dict] | None = None,
+    section_evidence: dict[str, list[dict]] | None = None,
+    combined: bool | None = None,
+    use_cache: bool = True,
+    serialized: _SerializedResume | None = None,
+    usage: dict[str, Any] | None = None,
 ) -> list[Suggestion]:
-    suggestions: list[Suggestion] = []
-    job_description = (job.description or "").strip()
-
-    model = get_model()
+    """
+    Run the section prompts concurrently. Each one only needs the resume, job
+    description and its own evidence, so wall time is the slowest section
+    rather than the sum. Suggestions come back in SECTION_KEYS order.
 
-    keys = [ "languages", "technologies", "experience" ]
+    In combined mode (TAILOR_COMBINED unless overridden) one prompt covers all
+    sections instead, falling back to the per-section prompts when its reply
+    cannot be parsed.
 
-    parsed_outputs = {}
+    Complete results are stored in tailor_cache; use_cache=False skips the
+    lookup but still refreshes the entry. Batch callers pass the resume
+    already serialized. Each prompt's token report is stored in usage.
+    """
+    job_description = (job.description or "").strip()
 
-    for i in range( len(tailor_prompts) ):
+    sections = [i for i, key in enumerate(SECTION_KEYS) if getattr(resume, key) is not None]
+    if not sections:
+        return []
+    serialized = serialized or _SerializedResume.of(resume)
+    use_combined = TAILOR_COMBINED if combined is None else combined
+    key = _cache_key(serialized, job_description, section_evidence, "combined" if use_combined else "sections")
+    if use_cache:
+        cached = await _cached_suggestions(key)
+        if cached is not None:
+            return cached
 
-        if( getattr( resume, keys[i] ) is None ): continue
+    model = get_model()
 
-        output_instructions = (
-            "IMPORTANT: Do NOT force yourself to create suggestions by fabricating information. It is ok to return an empty list. Reply with valid JSON only and nothing else. Do NOT include any explanatory text, markdown, or backticks. The JSON must match the schema example below exactly (use the same keys):\n"
-            + json.dumps(tailor_schema_examples[i], indent=2)
+    if use_combined:
+        suggestions = await _atailor_combined(
+            model, serialized.text, job_description, [SECTION_KEYS[i] for i in sections], section_evidence, usage
         )
-        
-        resume_instruction = "Here is the parsed resume you can use to contextualize your edits: \n" + resume.to_string()
-        grounding_instruction = ""
-        if evidence_chunks:
-            grounding_instruction = (
-                "\nIMPORTANT grounding rules:\n"
-                "- Only propose edits grounded in either the parsed resume or retrieved evidence.\n"
-                "- If you cannot ground a claim, return no suggestion.\n"
-                + _format_evidence(evidence_chunks)
+        if suggestions is not None:
+            await _store_suggestions(key, suggestions)
+            return suggestions
+    results = await asyncio.gather(
+        *(
+            _atailor_section(
+                model, serialized.text, job_description, i, (section_evidence or {}).get(SECTION_KEYS[i]), usage
             )
+            for i in sections
+        )
+    )
+    suggestions = [s for section in results for s in section or []]
+    # A timed-out section would make the cached result incomplete.
+    if all(section is not None for section in results):
+        await _store_suggestions(key, suggestions)
+    return suggestions
+
+
+async def aiter_tailored_sections(
+    resume: Resume,
+    job: Job,
+    section_evidence: dict[str, list[dict]] | None = None,
+    use_cache: bool = True,
+    usage: dict[str, Any] | None = None,
+) -> AsyncIterator[tuple[str, list[Suggestion] | None]]:
+    """
+    Yield (section, suggestions) as each section prompt finishes, fastest
+    first; suggestions is None for a section that timed out. Prompts still
+    running are cancelled if the consumer stops early. Shares cache entries
+    with per-section _atailor_resume_core; a hit yields every section at once.
+    Each prompt's token report is stored in usage, keyed by section.
+    """
+    job_description = (job.description or "").strip()
+    sections = [key for key in SECTION_KEYS if getattr(resume, key) is not None]
+    serialized = _SerializedResume.of(resume)
+    key = _cache_key(serialized, job_description, section_evidence, "sections")
+    cached = await _cached_suggestions(key) if use_cache and sections else None
+    if cached is not None:
+        for section in sections:
+            yield section, [s for s in cached if s.section == section]
+        return
+
+    model = get_model()
 
-        system_prompt = tailor_prompts[i] + output_instructions + resume_instruction + grounding_instruction
+    pending = {
+        asyncio.ensure_future(
+            _atailor_section(model, serialized.text, job_description, i, (section_evidence or {}).get(key), usage)
+        ): key
+        for i, key in enumerate(SECTION_KEYS)
+        if getattr(resume, key) is not None
+    }
+    finished: dict[str, list[Suggestion] | None] = {}
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda t: SECTION_KEYS.index(pending[t])):
+                section = pending.pop(task)
+                finished[section] = task.result()
+                yield section, finished[section]
+    finally:
+        for task in pending:
+            task.cancel()
+    if sections and all(finished.get(section) is not None for section in sections):
+        await _store_suggestions(key, [s for section in sections for s in finished[section]])
 
-        message = [("system", system_prompt), ("human", job_description)]
 
-        res = model.invoke( message )
+def _tailor_resume_core(
+    resume: Resume,
+    job: Job,
+    section_evidence: dict[str, list[dict]] | None = None,
+    combined: bool | None = None,
+    use_cache: bool = True,
+) -> list[Suggestion]:
+    return asyncio.run(_atailor_resume_core(resume, job, section_evidence, combined, use_cache))
 
-        raw = getattr( res, "text", str(res) )
 
-        parsed = parse_json(raw)
+def _retrieve_jobs_section_evidence(
+    db: Session,
+    user_id: uuid.UUID | None,
+    jobs: list[Job],
+) -> list[dict[str, list[dict]] | None]:
+    """Per-section RAG evidence for each job (None when there is none to offer)."""
+    if user_id is None or not jobs:
+        return [None] * len(jobs)
 
-        if parsed is None:
-            parsed_outputs[ keys[i] ] = None
-        else:
-            parsed_outputs[ keys[i] ] = parsed
-            #print(f"Parsed {keys[i]}:")
-            #print(json.dumps(parsed, indent=2))
+    query_texts: list[str] = []
+    for job in jobs:
+        job_context = (
+            f"Job title: {job.title}\n"
+            f"Company: {job.company or ''}\n"
+            f"Description: {job.description or ''}\n"
+        )
+        query_texts.extend(job_context + _SECTION_QUERIES[key] for key in SECTION_KEYS)
+    try:
+        # One embedding call and one corpus scan for every section of every job.
+        results = retrieve_relevant_chunks_batch(db=db, user_id=user_id, query_texts=query_texts, top_k=8)
+    except KnowledgeStoreUnavailableError:
+        return [None] * len(jobs)
+    out: list[dict[str, list[dict]] | None] = []
+    for start in range(0, len(results), len(SECTION_KEYS)):
+        section_evidence = {
+            key: chunks for key, chunks in zip(SECTION_KEYS, results[start : start + len(SECTION_KEYS)]) if chunks
+        }
+        out.append(section_evidence or None)
+    return out
 
-        section = keys[i]
-        if parsed_outputs[ keys[i] ] is not None:
-            for suggestion in parsed_outputs[ keys[i] ]:
-                # Convert string indices to integers if present (LLM may return strings)
-                entry_idx = suggestion.get("entryIdx")
-                entry_idx_int = None
-                if entry_idx is not None and entry_idx != "":
-                    try:
-                        entry_idx_int = int(entry_idx)
-                    except (ValueError, TypeError):
-                        entry_idx_int = None
-                    
-                bullet_idx = suggestion.get("bulletIdx")
-                bullet_idx_int = None
-                if bullet_idx is not None and bullet_idx != "":
-                    try:
-                        bullet_idx_int = int(bullet_idx)
-                    except (ValueError, TypeError):
-                        bullet_idx_int = None
-                
-                s = Suggestion(
-                    section=section,
-                    entryIdx=entry_idx_int,
-                    bulletIdx=bullet_idx_int,
-                    original=suggestion["original"],
-                    updated=suggestion["updated"],
-                    explanation=suggestion["explanation"]
-                )
-
-                suggestions.append( s )
 
-    return suggestions
+def _retrieve_section_evidence(
+    db: Session,
+    user_id: uuid.UUID | None,
+    job: Job,
+) -> dict[str, list[dict]] | None:
+    """Per-section RAG evidence, or None when the user has none to offer."""
+    return _retrieve_jobs_section_evidence(db, user_id, [job])[0]
 
 
 def tailor_resume_with_rag(
@@ -113,26 +423,119 @@ def tailor_resume_with_rag(
     job: Job,
     db: Session,
     user_id: uuid.UUID | None,
+    combined: bool | None = None,
+    use_cache: bool = True,
 ) -> list[Suggestion]:
     """
     RAG-first tailoring for authenticated users with stored knowledge.
     Falls back to legacy tailoring when no user knowledge is available.
     """
-    if user_id is None:
+    section_evidence = _retrieve_section_evidence(db, user_id, job)
+    if section_evidence is None:
         return tailor_resume(resume, job)
+    return _tailor_resume_core(
+        resume=resume, job=job, section_evidence=section_evidence, combined=combined, use_cache=use_cache
+    )
 
-    query = (
-        f"Job title: {job.title}\n"
-        f"Company: {job.company or ''}\n"
-        f"Description: {job.description or ''}\n"
-        "Find relevant resume evidence for languages, technologies, and experience bullets."
+
+async def atailor_resume_with_rag(
+    resume: Resume,
+    job: Job,
+    db: Session,
+    user_id: uuid.UUID | None,
+    combined: bool | None = None,
+    use_cache: bool = True,
+) -> list[Suggestion]:
+    """tailor_resume_with_rag for callers already running an event loop."""
+    section_evidence = await asyncio.to_thread(_retrieve_section_evidence, db, user_id, job)
+    usage: dict[str, Any] = {}
+    suggestions = await _atailor_resume_core(
+        resume=resume,
+        job=job,
+        section_evidence=section_evidence,
+        combined=combined,
+        use_cache=use_cache,
+        usage=usage,
     )
+    for section, report in usage.items():
+        logger.info(
+            "tailor prompt job=%s section=%s tokens=%s evidenceDropped=%d truncated=%s",
+            job.id,
+            section,
+            report["tokens"],
+            report["evidenceDropped"],
+            report["truncated"],
+        )
+    return suggestions
+
+
+async def stream_tailor_resume_with_rag(
+    resume: Resume,
+    job: Job,
+    db: Session,
+    user_id: uuid.UUID | None,
+    use_cache: bool = True,
+    usage: dict[str, Any] | None = None,
+) -> AsyncIterator[tuple[str, list[Suggestion] | None]]:
+    """
+    aiter_tailored_sections with the user's evidence. Retrieval runs on a
+    thread when awaited, while the request's database session is still open;
+    the model calls run as the returned iterator is consumed.
+    """
+    section_evidence = await asyncio.to_thread(_retrieve_section_evidence, db, user_id, job)
+    return aiter_tailored_sections(resume, job, section_evidence, use_cache, usage)
+
+
+async def aiter_tailored_jobs(
+    resume: Resume,
+    jobs: list[Job],
+    job_evidence: list[dict[str, list[dict]] | None] | None = None,
+    combined: bool | None = None,
+    use_cache: bool = True,
+) -> AsyncIterator[tuple[int, list[Suggestion] | None]]:
+    """
+    Tailor one resume against many jobs, yielding (job index, suggestions) as
+    each job finishes; suggestions is None for a job whose tailoring raised.
+    The resume is serialized once and every model call shares the
+    TAILOR_MAX_CONCURRENCY cap. Jobs still running are cancelled if the
+    consumer stops early.
+    """
+    serialized = _SerializedResume.of(resume)
+    evidence = job_evidence or [None] * len(jobs)
+
+    async def run(job: Job, section_evidence: dict[str, list[dict]] | None) -> list[Suggestion] | None:
+        try:
+            return await _atailor_resume_core(resume, job, section_evidence, combined, use_cache, serialized)
+        except Exception:
+            logger.exception("tailoring failed for job=%s", job.id)
+            return None
+
+    pending = {
+        asyncio.ensure_future(run(job, section_evidence)): i
+        for i, (job, section_evidence) in enumerate(zip(jobs, evidence))
+    }
     try:
-        chunks = retrieve_relevant_chunks(db=db, user_id=user_id, query_text=query, top_k=10)
-    except KnowledgeStoreUnavailableError:
-        return tailor_resume(resume, job)
-    if not chunks:
-        return tailor_resume(resume, job)
-    return _tailor_resume_core(resume=resume, job=job, evidence_chunks=chunks)
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
 
 
+async def stream_tailor_jobs_with_rag(
+    resume: Resume,
+    jobs: list[Job],
+    db: Session,
+    user_id: uuid.UUID | None,
+    combined: bool | None = None,
+    use_cache: bool = True,
+) -> AsyncIterator[tuple[int, list[Suggestion] | None]]:
+    """
+    aiter_tailored_jobs with the user's evidence. Retrieval for all jobs runs
+    on a thread when awaited, as one batch against the user's corpus, while
+    the request's database session is still open.
+    """
+    job_evidence = await asyncio.to_thread(_retrieve_jobs_section_evidence, db, user_id, jobs)
+    return aiter_tailored_jobs(resume, jobs, job_evidence, combined, use_cache)
@@ -0,0 +1,75 @@
+# Persistent cache of tailoring results. Tailoring runs at temperature 0, so
+# identical inputs give effectively identical suggestions; the key covers
+# everything that reaches the model (resume, job description, evidence chunk
+# ids, model name, prompt version and mode). Entries expire after TTL_SECONDS
+# and the table is trimmed to MAX_ROWS least recently used entries; storage
+# is db_cache.DbCache, shared with the parse cache.
+
+import hashlib
+import json
+import os
+from typing import Any
+
+from app import prompt_budget
+from app.db.models import TailorCacheEntry
+from app.db_cache import DbCache
+from app.prompts import tailor_combined, tailor_combined_schema_example, tailor_prompts, tailor_schema_examples
+
+TTL_SECONDS = int(os.environ.get("TAILOR_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ROWS = int(os.environ.get("TAILOR_CACHE_MAX_ROWS", "50000"))
+EVICT_EVERY = int(os.environ.get("TAILOR_CACHE_EVICT_EVERY", "200"))
+
+# Bump when tailor.py or prompt_budget.py change how prompts are assembled;
+# edits to the prompts themselves or to the token budget change PROMPT_VERSION
+# automatically.
+PROMPT_REVISION = 2
+PROMPT_VERSION = hashlib.sha256(
+    json.dumps(
+        [
+            PROMPT_REVISION,
+            tailor_prompts,
+            tailor_schema_examples,
+            tailor_combined,
+            tailor_combined_schema_example,
+            prompt_budget.PROMPT_TOKEN_BUDGET,
+        ],
+        sort_keys=True,
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+_cache = DbCache(TailorCacheEntry, "suggestions", MAX_ROWS, EVICT_EVERY, ttl_seconds=TTL_SECONDS)
+
+
+def cache_key(
+    resume: dict[str, Any],
+    job_description: str,
+    evidence_ids: dict[str, list[str]],
+    model_name: str,
+    mode: str,
+) -> str:
+    """sha256 of the canonical JSON of every tailoring input."""
+    payload = {
+        "resume": resume,
+        "job": job_description,
+        "evidence": {section: list(ids) for section, ids in sorted(evidence_ids.items())},
+        "model": model_name,
+        "prompt": PROMPT_VERSION,
+        "mode": mode,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get(key: str) -> list[dict[str, Any]] | None:
+    """Cached suggestion dicts for key, or None when missing or expired."""
+    suggestions = _cache.get(key)
+    return suggestions if isinstance(suggestions, list) else None
+
+
+def put(key: str, suggestions: list[dict[str, Any]]) -> None:
+    _cache.put(key, suggestions)
+
+
+def evict(max_rows: int = MAX_ROWS) -> int:
+    """Delete expired entries, then least recently used ones beyond max_rows."""
+    return _cache.evict(max_rows)
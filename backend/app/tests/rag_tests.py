@@ -1,10 +1,95 @@
 import os
 import sys
 import math
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.rag import _chunk_text, _fallback_embedding
+from app import embedding_cache, rag
+from app.lexical import Postings, bm25_scores, pack_postings, tokenize
+from app.rag import _chunk_text, _embedding_matrix, _fallback_embedding, _top_k_indices
+
+
+@pytest.fixture(autouse=True)
+def in_memory_embedding_cache(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(
+        embedding_cache,
+        "_load_from_db",
+        lambda model, task, hashes: {h: stored[(model, task, h)] for h in hashes if (model, task, h) in stored},
+    )
+    monkeypatch.setattr(
+        embedding_cache,
+        "_store_in_db",
+        lambda model, task, vectors: stored.update({(model, task, h): v for h, v in vectors.items()}),
+    )
+    monkeypatch.setattr(embedding_cache, "evict", lambda *_args: 0)
+    embedding_cache.clear_memory()
+    embedding_cache.reset_stats()
+    return stored
+
+
+def _postings(*counts):
+    """Postings for documents with the given term counts, packed as they are stored."""
+    return Postings.from_packed([pack_postings(c) for c in counts])
+
+
+class _FakeQuery:
+    """Chainable stand-in for a SQLAlchemy query over fixed rows."""
+
+    def __init__(self, rows, filters):
+        self.rows = rows
+        self.filters = filters
+        self.n = None
+
+    def filter(self, *conditions):
+        self.conditions = conditions
+        self.filters.append(conditions)
+        return self
+
+    def order_by(self, *_args):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def all(self):
+        rows = self.rows(self.conditions) if callable(self.rows) else self.rows
+        return list(rows)[: self.n]
+
+
+def _fake_db(*responses):
+    """
+    Session stand-in whose query() calls return the given rows in turn,
+    repeating the last. A callable response gets the filter conditions.
+    Query columns and filter conditions are kept on db.queries and db.filters.
+    """
+    db = SimpleNamespace(queries=[], filters=[])
+
+    def query(*cols):
+        db.queries.append(cols)
+        return _FakeQuery(responses[min(len(db.queries), len(responses)) - 1], db.filters)
+
+    db.query = query
+    return db
+
+
+def _corpus(chunk_ids, vectors, token_counts, postings):
+    matrix = _embedding_matrix(vectors)
+    codes, scales = rag._quantize_rows(matrix)
+    return rag._UserCorpus(
+        chunk_ids=chunk_ids,
+        codes=codes,
+        scales=scales,
+        token_counts=token_counts,
+        postings=postings,
+        matrix=matrix,
+    )
 
 
 def test_chunk_text_splits_large_content():
@@ -19,3 +104,428 @@ def test_fallback_embedding_is_normalized():
     norm = math.sqrt(sum(v * v for v in vec))
     assert len(vec) == 64
     assert abs(norm - 1.0) < 1e-6
+
+
+def test_embedding_matrix_pads_and_normalizes_rows():
+    matrix = _embedding_matrix([[3.0, 4.0], [1.0, 0.0, 0.0, 0.0], None])
+    assert matrix.shape == (3, 4)
+    assert matrix.dtype == np.float32
+    assert np.allclose(matrix[0], [0.6, 0.8, 0.0, 0.0])
+    assert np.allclose(matrix[2], 0.0)
+
+
+def test_top_k_indices_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.9, 0.3], dtype=np.float32)
+    assert _top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert _top_k_indices(scores, 50).tolist() == [1, 3, 2, 4, 0]
+
+
+def test_retrieve_scores_cached_corpus(monkeypatch):
+    user_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in range(3)]
+    rows = {
+        cid: SimpleNamespace(
+            id=cid, document_id=uuid.uuid4(), chunk_index=i, text=f"chunk {i}", metadata_json=None
+        )
+        for i, cid in enumerate(ids)
+    }
+    loads = []
+
+    def fake_load(_db, uid, _version=0):
+        loads.append(uid)
+        return _corpus(ids, [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], np.zeros(3, dtype=np.float32), _postings())
+
+    db = _fake_db(list(rows.values()))
+    monkeypatch.setattr(rag, "_load_user_corpus", fake_load)
+    monkeypatch.setattr(rag, "_embed_query", lambda _text: ([0.0, 1.0], True))
+    monkeypatch.setattr(rag, "_corpus_version", lambda _db, _uid: 0)
+    rag._corpus_cache.clear()
+    rag._result_cache.clear()
+
+    first = rag.retrieve_relevant_chunks(db, user_id, "query", top_k=2)
+    second = rag.retrieve_relevant_chunks(db, user_id, "other query", top_k=2)
+
+    assert [r["chunkId"] for r in first] == [str(ids[1]), str(ids[2])]
+    assert first == second
+    assert loads == [user_id]
+
+    rag._invalidate_user_corpus(user_id)
+    rag.retrieve_relevant_chunks(db, user_id, "third query", top_k=2)
+    assert loads == [user_id, user_id]
+
+
+def test_retrieve_result_cache_follows_corpus_version(monkeypatch):
+    user_id = uuid.uuid4()
+    version = {"value": 3}
+    embeds = []
+    corpus = _corpus([uuid.uuid4()], [[1.0, 0.0]], np.zeros(1, dtype=np.float32), _postings())
+    row = SimpleNamespace(
+        id=corpus.chunk_ids[0], document_id=uuid.uuid4(), chunk_index=0, text="t", metadata_json=None
+    )
+
+    db = _fake_db([row])
+    monkeypatch.setattr(rag, "_corpus_version", lambda _db, _uid: version["value"])
+    monkeypatch.setattr(rag, "_load_user_corpus", lambda *_args: corpus)
+    monkeypatch.setattr(rag, "_embed_query", lambda text: embeds.append(text) or ([1.0, 0.0], True))
+    rag._corpus_cache.clear()
+    rag._result_cache.clear()
+
+    first = rag.retrieve_relevant_chunks(db, user_id, "job", top_k=4)
+    first[0]["text"] = "mutated by caller"
+    again = rag.retrieve_relevant_chunks(db, user_id, "job", top_k=4)
+    assert embeds == ["job"]
+    assert again[0]["text"] == "t"
+
+    rag.retrieve_relevant_chunks(db, user_id, "job", top_k=2)
+    version["value"] = 4
+    rag.retrieve_relevant_chunks(db, user_id, "job", top_k=4)
+    assert embeds == ["job", "job", "job"]
+
+
+def test_retrieve_batch_embeds_queries_together_and_scans_once(monkeypatch):
+    user_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in range(3)]
+    rows = [
+        SimpleNamespace(id=cid, document_id=uuid.uuid4(), chunk_index=i, text=f"chunk {i}", metadata_json=None)
+        for i, cid in enumerate(ids)
+    ]
+    corpus = _corpus(ids, [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], np.zeros(3, dtype=np.float32), _postings())
+    calls = []
+
+    class FakeEmbeddings:
+        def embed_documents(self, texts, task_type=None):
+            calls.append((list(texts), task_type))
+            return [[1.0, 0.0] if "python" in t else [0.0, 1.0] for t in texts]
+
+    db = _fake_db(rows)
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: FakeEmbeddings())
+    monkeypatch.setattr(rag, "get_embedding_model_name", lambda: "fake-model")
+    monkeypatch.setattr(rag, "_corpus_version", lambda _db, _uid: 0)
+    monkeypatch.setattr(rag, "_load_user_corpus", lambda *_args: corpus)
+    rag._corpus_cache.clear()
+    rag._result_cache.clear()
+
+    results = rag.retrieve_relevant_chunks_batch(db, user_id, ["python", "design", "python"], top_k=1)
+
+    assert calls == [(["python", "design"], "RETRIEVAL_QUERY")]
+    assert len(db.queries) == 1
+    assert [[r["chunkId"] for r in result] for result in results] == [
+        [str(ids[0])],
+        [str(ids[1])],
+        [str(ids[0])],
+    ]
+    assert rag.retrieve_relevant_chunks(db, user_id, "design", top_k=1) == results[1]
+    assert len(calls) == 1
+
+
+def test_retrieve_does_not_cache_results_of_a_failed_embedding_call(monkeypatch):
+    user_id = uuid.uuid4()
+    corpus = _corpus([uuid.uuid4()], [[1.0, 0.0]], np.zeros(1, dtype=np.float32), _postings())
+    row = SimpleNamespace(
+        id=corpus.chunk_ids[0], document_id=uuid.uuid4(), chunk_index=0, text="t", metadata_json=None
+    )
+    calls = []
+    healthy = {"value": False}
+
+    class FlakyEmbeddings:
+        def embed_query(self, text):
+            calls.append(text)
+            if not healthy["value"]:
+                raise RuntimeError("embeddings API unavailable")
+            return [1.0, 0.0]
+
+    db = _fake_db([row])
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: FlakyEmbeddings())
+    monkeypatch.setattr(rag, "get_embedding_model_name", lambda: "fake-model")
+    monkeypatch.setattr(rag, "_corpus_version", lambda _db, _uid: 0)
+    monkeypatch.setattr(rag, "_load_user_corpus", lambda *_args: corpus)
+    rag._corpus_cache.clear()
+    rag._result_cache.clear()
+
+    rag.retrieve_relevant_chunks(db, user_id, "job", top_k=1)
+    healthy["value"] = True
+    rag.retrieve_relevant_chunks(db, user_id, "job", top_k=1)
+    rag.retrieve_relevant_chunks(db, user_id, "job", top_k=1)
+    assert calls == ["job", "job"]
+
+    # Without a model the fallback is the normal path and is cached.
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: None)
+    rag.retrieve_relevant_chunks(db, user_id, "offline", top_k=1)
+    assert len(rag._result_cache) == 2
+
+
+def test_embed_texts_batches_and_falls_back_per_chunk(monkeypatch):
+    calls = []
+
+    class FakeEmbeddings:
+        def embed_documents(self, texts):
+            calls.append(list(texts))
+            if "boom" in texts:
+                raise RuntimeError("batch failed")
+            return [[] if t == "bad" else [2.0, 0.0] for t in texts]
+
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: FakeEmbeddings())
+    texts = ["a", "bad", "c", "boom", "e"]
+
+    out = rag._embed_texts(texts, batch_size=2, max_concurrency=2)
+
+    # The failing batch is retried one text at a time.
+    assert sorted(len(c) for c in calls) == [1, 1, 1, 2, 2]
+    assert out[0].tolist() == [1.0, 0.0]
+    assert out[2].tolist() == [1.0, 0.0]
+    assert out[1] == _fallback_embedding("bad")
+    assert out[3] == _fallback_embedding("boom")
+    assert out[4].tolist() == [1.0, 0.0]
+
+
+def test_embedding_cache_skips_model_for_known_text(monkeypatch, in_memory_embedding_cache):
+    calls = []
+
+    class FakeEmbeddings:
+        def embed_documents(self, texts):
+            calls.append(("documents", list(texts)))
+            return [[1.0, 1.0] for _ in texts]
+
+        def embed_query(self, text):
+            calls.append(("query", text))
+            return [0.0, 2.0]
+
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: FakeEmbeddings())
+
+    first = rag._embed_texts(["same", "other", "same"])
+    assert calls == [("documents", ["same", "other"])]
+    assert first[0].dtype == np.float32 and not first[0].flags.writeable
+    assert first[0].tolist() == first[2].tolist()
+
+    embedding_cache.clear_memory()
+    second = rag._embed_texts(["other", "same"])
+    assert len(calls) == 1
+    assert [v.tolist() for v in second] == [first[1].tolist(), first[0].tolist()]
+
+    assert rag._embed_text("job description").tolist() == [0.0, 1.0]
+    assert rag._embed_text("job description").tolist() == [0.0, 1.0]
+    assert calls[1:] == [("query", "job description")]
+
+    stats = embedding_cache.stats()
+    assert stats["db_hits"] == 2
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_tokenize_keeps_technology_names():
+    assert tokenize("Built gRPC services with C++, Node.js and Kafka.") == [
+        "built", "grpc", "services", "c++", "node.js", "kafka",
+    ]
+
+
+def test_bm25_prefers_rare_exact_terms():
+    postings = _postings({"python": 1}, {"python": 1}, {"python": 1, "kafka": 2})
+    token_counts = np.array([5, 5, 5], dtype=np.float32)
+    scores = bm25_scores(postings, token_counts, tokenize("Python and Kafka"))
+    assert int(np.argmax(scores)) == 2
+    assert scores[0] == scores[1] > 0
+
+
+def test_hybrid_scores_surface_keyword_match_over_weak_vectors():
+    corpus = _corpus(
+        [uuid.uuid4(), uuid.uuid4()],
+        [[1.0, 0.0], [0.9, 0.1]],
+        np.array([4, 4], dtype=np.float32),
+        _postings({}, {"kafka": 1}),
+    )
+    vector_only, _ = rag._rank(None, corpus, [1.0, 0.0], "", 1, rag.LEXICAL_WEIGHT)
+    hybrid, _ = rag._rank(None, corpus, [1.0, 0.0], "Kafka", 1, rag.FALLBACK_LEXICAL_WEIGHT)
+    assert vector_only.tolist() == [0]
+    assert hybrid.tolist() == [1]
+
+
+def test_quantized_first_pass_with_rescoring_keeps_exact_ranking():
+    rng = np.random.default_rng(7)
+    n, dims, top_k = 5000, 256, 10
+    matrix = rng.standard_normal((n, dims)).astype(np.float32)
+    corpus = _corpus([uuid.uuid4() for _ in range(n)], matrix, np.zeros(n, dtype=np.float32), _postings())
+    assert corpus.codes.dtype == np.int8
+    assert corpus.codes.nbytes + corpus.scales.nbytes < corpus.matrix.nbytes / 3.9
+
+    hits = 0
+    for _ in range(20):
+        # Queries near a stored chunk, like a real question about one topic.
+        q = corpus.matrix[rng.integers(n)] + 0.5 * rng.standard_normal(dims).astype(np.float32) / np.sqrt(dims)
+        exact = _top_k_indices(corpus.matrix @ q, top_k)
+        rows, scores = rag._rank(None, corpus, q.tolist(), "", top_k, rag.LEXICAL_WEIGHT)
+        hits += len(set(rows.tolist()) & set(exact.tolist()))
+        assert np.allclose(scores, (corpus.matrix @ q)[rows], atol=1e-5)
+    assert hits / (20 * top_k) >= 0.99
+
+
+def test_exact_rows_fetches_each_chunk_once_in_bounded_batches(monkeypatch):
+    monkeypatch.setattr(rag, "EXACT_FETCH_BATCH", 2)
+    ids = [uuid.uuid4() for _ in range(5)]
+    stored = {cid: (cid, embedding_cache.pack_embedding([float(i), 1.0]), "float32", None) for i, cid in enumerate(ids)}
+    db = _fake_db(lambda conditions: [stored[cid] for cid in conditions[0].right.value if cid != ids[4]])
+    exact = rag._exact_rows(db, ids, [3, 0, 3, 1, 4, 2, 0])
+
+    assert [len(conditions[0].right.value) for conditions in db.filters] == [2, 2, 1]
+    assert exact.shape == (7, 2)
+    assert np.allclose(exact[0], exact[2]) and np.allclose(exact[1], [0.0, 1.0])
+    assert np.allclose(exact[4], 0.0)  # deleted since the corpus was loaded
+
+
+def test_match_chunks_reuses_unchanged_text():
+    rows = [
+        SimpleNamespace(id=uuid.uuid4(), text=text, text_hash=None, chunk_index=i)
+        for i, text in enumerate(["intro", "kafka work", "old ending", "intro"])
+    ]
+    kept, added, stale = rag._match_chunks(rows, ["new opening", "intro", "kafka work", "intro"])
+
+    assert [(idx, row.text) for idx, row in kept] == [(1, "intro"), (2, "kafka work"), (3, "intro")]
+    assert kept[0][1] is rows[0] and kept[2][1] is rows[3]
+    assert added == [(0, "new opening")]
+    assert stale == [rows[2].id]
+
+
+def test_packed_embeddings_decode_into_normalized_matrix():
+    blob32 = embedding_cache.pack_embedding([3.0, 4.0], "float32")
+    blob16 = embedding_cache.pack_embedding([0.0, 2.0], "float16")
+    assert len(blob32) == 8 and len(blob16) == 4
+    assert embedding_cache.unpack_embedding(blob16, "float16").tolist() == [0.0, 2.0]
+
+    uniform = rag._blob_matrix([blob32, embedding_cache.pack_embedding([1.0, 0.0])], ["float32", "float32"], [None, None])
+    assert uniform.dtype == np.float32
+    assert np.allclose(uniform, [[0.6, 0.8], [1.0, 0.0]])
+
+    mixed = rag._blob_matrix([blob32, blob16, None], ["float32", "float16", None], [None, None, [0.0, 0.0, 5.0]])
+    assert mixed.shape == (3, 3)
+    assert np.allclose(mixed, [[0.6, 0.8, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+def test_list_documents_pages_with_keyset_cursor():
+    from datetime import datetime, timedelta, timezone
+
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    docs = [
+        SimpleNamespace(
+            id=uuid.uuid4(), title=f"doc {i}", source_type="note",
+            created_at=base - timedelta(minutes=i), chunk_count=i,
+        )
+        for i in range(3)
+    ]
+    db = _fake_db(docs)
+
+    page = rag.list_user_knowledge_documents(db, uuid.uuid4(), limit=2)
+    assert [d["title"] for d in page["items"]] == ["doc 0", "doc 1"]
+    assert page["items"][1]["chunkCount"] == 1
+    assert rag._decode_cursor(page["nextCursor"]) == (docs[1].created_at, docs[1].id)
+
+    rag.list_user_knowledge_documents(db, uuid.uuid4(), limit=2, cursor=page["nextCursor"])
+    assert len(db.filters[-1]) == 1  # keyset condition on (created_at, id)
+
+    with pytest.raises(ValueError):
+        rag.list_user_knowledge_documents(db, uuid.uuid4(), cursor="not-a-cursor")
+
+
+def test_iter_chunks_breaks_on_sentences_with_overlap():
+    text = " ".join(f"Sentence {i} mentions Kafka." for i in range(40))
+    chunks = list(rag._iter_chunks(text, chunk_size=120, overlap=40))
+    assert len(chunks) > 5
+    assert all(len(c) <= 120 for c in chunks)
+    assert all(c.endswith(".") and c.startswith("Sentence") for c in chunks)
+    # The last sentence of one chunk opens the next.
+    assert chunks[1].startswith(chunks[0].rsplit(". ", 1)[-1].rstrip("."))
+
+
+def test_iter_chunks_is_lazy():
+    chunks = rag._iter_chunks("One. " * 100_000, chunk_size=50, overlap=10)
+    assert next(chunks).startswith("One.")
+
+
+def test_insert_chunks_flushes_fixed_size_groups(monkeypatch):
+    monkeypatch.setattr(rag, "EMBED_BATCH_SIZE", 2)
+    monkeypatch.setattr(rag, "EMBED_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: None)
+    saved = []
+    progress = []
+    db = SimpleNamespace(
+        bulk_save_objects=lambda rows: saved.append(len(rows)),
+        flush=lambda: None,
+    )
+    doc = SimpleNamespace(id=uuid.uuid4(), user_id=uuid.uuid4(), title="t", source_type="note")
+    chunks = (f"chunk {i}" for i in range(9))
+
+    inserted = rag._insert_chunks(db, doc, enumerate(chunks), 9, lambda d, t: progress.append((d, t)))
+
+    assert inserted == 9
+    assert saved == [4, 4, 1]
+    assert progress == [(4, 9), (8, 9), (9, 9)]
+
+
+def test_insert_chunks_stores_near_duplicates_as_references(monkeypatch):
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: None)
+    embedded = []
+    real_embed = rag._embed_documents
+    monkeypatch.setattr(rag, "_embed_documents", lambda texts: embedded.extend(texts) or real_embed(texts))
+    saved = []
+    db = SimpleNamespace(
+        bulk_save_objects=lambda rows: saved.extend(rows),
+        flush=lambda: None,
+    )
+    doc = SimpleNamespace(id=uuid.uuid4(), user_id=uuid.uuid4(), title="t", source_type="note")
+    bullet = (
+        "Built a distributed ingestion pipeline in Python and Kafka that processed two million "
+        "events per day with exactly-once delivery, idempotent consumers and replayable offsets"
+    )
+    chunks = [bullet, "Led the billing migration from a monolith to Go services on Kubernetes.", bullet + "."]
+
+    index = rag.minhash.LSHIndex(rag.DUPLICATE_THRESHOLD)
+    rag._insert_chunks(db, doc, enumerate(chunks), duplicates=index)
+
+    assert embedded == chunks[:2]
+    assert [row.duplicate_of_id for row in saved] == [None, None, saved[0].id]
+    assert saved[2].embedding_vec is None
+    assert [row.term_postings is not None for row in saved] == [True, True, False]
+    assert len(index) == 2
+
+
+def test_insert_chunks_never_matches_chunks_without_words(monkeypatch):
+    monkeypatch.setattr(rag, "get_embeddings_model", lambda: None)
+    saved = []
+    db = SimpleNamespace(bulk_save_objects=lambda rows: saved.extend(rows), flush=lambda: None)
+    doc = SimpleNamespace(id=uuid.uuid4(), user_id=uuid.uuid4(), title="t", source_type="note")
+    chunks = ["--- * ---", "Led the billing migration from a monolith to Go services.", "* * *"]
+
+    assert rag.minhash.signature(chunks[0]) is None
+    index = rag.minhash.LSHIndex(rag.DUPLICATE_THRESHOLD)
+    rag._insert_chunks(db, doc, enumerate(chunks), duplicates=index)
+
+    assert [row.duplicate_of_id for row in saved] == [None, None, None]
+    assert [row.minhash is None for row in saved] == [True, False, True]
+    assert len(index) == 1
+
+
+def test_corpus_loads_from_memory_mapped_shard(monkeypatch, tmp_path):
+    from app import embedding_shards
+
+    monkeypatch.setattr(embedding_shards, "SHARD_DIR", str(tmp_path))
+    user_id = uuid.uuid4()
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    matrix = _embedding_matrix([[1.0, 0.0], [0.6, 0.8]])
+
+    assert embedding_shards.load_shard(user_id, 1) is None
+    embedding_shards.write_shard(user_id, 1, ids, matrix)
+    embedding_shards.write_shard(user_id, 2, ids[:1], matrix[:1])
+    assert embedding_shards.load_shard(user_id, 1) is None  # older versions are dropped
+
+    embedding_shards.write_shard(user_id, 3, ids, matrix)
+    loaded_ids, loaded = embedding_shards.load_shard(user_id, 3)
+    assert loaded_ids == ids
+    assert isinstance(loaded, np.memmap)
+    assert np.allclose(loaded, matrix)
+
+    db = _fake_db([(ids[0], 2, pack_postings({"python": 1})), (ids[1], 5, pack_postings({"kafka": 1}))])
+
+    corpus = rag._load_user_corpus(db, user_id, 3)
+    assert corpus.chunk_ids == ids
+    assert corpus.token_counts.tolist() == [2.0, 5.0]
+    assert corpus.postings.get("kafka")[0].tolist() == [1]
+    assert isinstance(corpus.matrix, np.memmap)
+    assert np.allclose(corpus.codes * corpus.scales[:, None], matrix, atol=0.01)
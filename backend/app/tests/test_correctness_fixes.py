@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 import sys
 import uuid
@@ -17,6 +18,16 @@ from app.rag import KnowledgeStoreUnavailableError
 from app.tailor import tailor_resume_with_rag
 
 
+@pytest.fixture(autouse=True)
+def memory_tailor_cache(monkeypatch):
+    from app import tailor_cache
+
+    store = {}
+    monkeypatch.setattr(tailor_cache, "get", store.get)
+    monkeypatch.setattr(tailor_cache, "put", store.__setitem__)
+    return store
+
+
 def test_required_auth_malformed_sub_returns_401(monkeypatch):
     monkeypatch.setattr(
         dependencies,
@@ -44,7 +55,7 @@ def test_job_accepts_job_description_alias():
 def test_tailor_with_rag_falls_back_when_knowledge_unavailable(monkeypatch):
     fallback = [{"section": "experience"}]
     monkeypatch.setattr(
-        "app.tailor.retrieve_relevant_chunks",
+        "app.tailor.retrieve_relevant_chunks_batch",
         lambda **_kwargs: (_ for _ in ()).throw(
             KnowledgeStoreUnavailableError("knowledge store unavailable")
         ),
@@ -63,7 +74,7 @@ def test_tailor_with_rag_falls_back_when_knowledge_unavailable(monkeypatch):
 def test_create_knowledge_returns_503_when_store_unavailable(monkeypatch):
     monkeypatch.setattr(
         resume_api,
-        "ingest_user_knowledge",
+        "enqueue_knowledge_ingestion",
         lambda **_kwargs: (_ for _ in ()).throw(
             KnowledgeStoreUnavailableError("knowledge store unavailable")
         ),
@@ -77,3 +88,692 @@ def test_create_knowledge_returns_503_when_store_unavailable(monkeypatch):
         )
 
     assert exc_info.value.status_code == 503
+
+
+def test_ingestion_job_reports_progress_and_completion(monkeypatch):
+    from app import ingest_queue
+
+    updates = []
+    doc = SimpleNamespace(id=uuid.uuid4())
+
+    def fake_ingest(**kwargs):
+        kwargs["on_progress"](0, 3)
+        kwargs["on_progress"](3, 3)
+        return doc, 3
+
+    monkeypatch.setattr(ingest_queue, "ingest_user_knowledge", fake_ingest)
+    monkeypatch.setattr(ingest_queue, "_update_job", lambda _job_id, **values: updates.append(values))
+    monkeypatch.setattr(ingest_queue, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+
+    ingest_queue._run_ingestion(uuid.uuid4(), uuid.uuid4(), "t", "c", "note")
+
+    assert updates[0] == {"status": "running"}
+    assert updates[1:3] == [
+        {"chunks_embedded": 0, "chunks_total": 3},
+        {"chunks_embedded": 3, "chunks_total": 3},
+    ]
+    assert updates[-1]["status"] == "completed"
+    assert updates[-1]["document_id"] == doc.id
+
+
+def test_ingestion_job_marks_failure(monkeypatch):
+    from app import ingest_queue
+
+    updates = []
+    monkeypatch.setattr(
+        ingest_queue,
+        "ingest_user_knowledge",
+        lambda **_kwargs: (_ for _ in ()).throw(
+            KnowledgeStoreUnavailableError("knowledge store unavailable")
+        ),
+    )
+    monkeypatch.setattr(ingest_queue, "_update_job", lambda _job_id, **values: updates.append(values))
+    monkeypatch.setattr(ingest_queue, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+
+    ingest_queue._run_ingestion(uuid.uuid4(), uuid.uuid4(), "t", "c", "note")
+
+    assert updates[-1] == {"status": "failed", "error": "knowledge storage is unavailable"}
+
+
+def test_ingestion_job_logs_unexpected_errors(monkeypatch, caplog):
+    from app import ingest_queue
+
+    updates = []
+    job_id = uuid.uuid4()
+    monkeypatch.setattr(
+        ingest_queue, "ingest_user_knowledge", lambda **_kwargs: (_ for _ in ()).throw(ValueError("bad chunk"))
+    )
+    monkeypatch.setattr(ingest_queue, "_update_job", lambda _job_id, **values: updates.append(values))
+    monkeypatch.setattr(ingest_queue, "SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+
+    with caplog.at_level("ERROR", logger="app.ingest_queue"):
+        ingest_queue._run_ingestion(job_id, uuid.uuid4(), "t", "c", "note")
+
+    assert updates[-1] == {"status": "failed", "error": "ingestion failed: ValueError"}
+    failures = [r for r in caplog.records if str(job_id) in r.getMessage()]
+    assert failures and failures[0].exc_info[0] is ValueError
+
+
+def test_tailor_sections_run_concurrently_in_section_order(monkeypatch):
+    from app import tailor
+
+    delays = {"Languages": 0.3, "Technologies": 0.1, "Experience": 0.2}
+    started = []
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            section = next(name for name in delays if f"Only focus on the {name} section" in message[0][1])
+            started.append(section)
+            await asyncio.sleep(delays[section])
+            suggestion = {"entryIdx": "0", "original": "", "updated": section, "explanation": "x"}
+            return SimpleNamespace(text=json.dumps([suggestion]))
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"], technologies=["Docker"], experience=[])
+    job = Job(id="1", title="x", url="https://example.com", description="desc")
+
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        out = loop.run_until_complete(tailor._atailor_resume_core(resume, job))
+        elapsed = loop.time() - start
+    finally:
+        loop.close()
+
+    assert [s.section for s in out] == ["languages", "technologies", "experience"]
+    assert len(started) == 3
+    assert elapsed < 0.5
+
+    monkeypatch.setattr(tailor, "TAILOR_SECTION_TIMEOUT", 0.15)
+    out = tailor._tailor_resume_core(resume, job, use_cache=False)
+    assert [s.section for s in out] == ["technologies"]
+
+
+def test_tailor_combined_mode_uses_one_call_and_falls_back(monkeypatch):
+    from app import tailor
+
+    calls = []
+    replies = []
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            calls.append(message[0][1])
+            return SimpleNamespace(text=replies.pop(0))
+
+    def suggestion(updated):
+        return {"entryIdx": "0", "bulletIdx": None, "original": "", "updated": updated, "explanation": "x"}
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"], technologies=["Docker"])
+    job = Job(id="1", title="x", url="https://example.com", description="desc")
+
+    replies.append(json.dumps({"languages": [suggestion("Go")], "technologies": [suggestion("AWS")], "experience": []}))
+    out = tailor._tailor_resume_core(resume, job, combined=True)
+    assert [(s.section, s.updated) for s in out] == [("languages", "Go"), ("technologies", "AWS")]
+    assert len(calls) == 1
+    assert "no experience section" in calls[0]
+
+    calls.clear()
+    replies.extend(["not json", json.dumps([suggestion("Go")]), json.dumps([suggestion("AWS")])])
+    out = tailor._tailor_resume_core(resume, job, combined=True, use_cache=False)
+    assert [(s.section, s.updated) for s in out] == [("languages", "Go"), ("technologies", "AWS")]
+    assert len(calls) == 3
+
+
+def test_tailor_stream_emits_sections_as_they_finish(monkeypatch):
+    from app import tailor
+
+    delays = {"Languages": 0.2, "Technologies": 0.05}
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            section = next(name for name in delays if f"Only focus on the {name} section" in message[0][1])
+            await asyncio.sleep(delays[section])
+            suggestion = {"entryIdx": "0", "original": "", "updated": section, "explanation": "x"}
+            return SimpleNamespace(text=json.dumps([suggestion]))
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"], technologies=["Docker"])
+    job = Job(id="1", title="x", url="https://example.com", description="desc")
+
+    async def collect():
+        response = await resume_api.tailorResumeStream(resume=resume, job=job, db=object(), current_user=None)
+        return [chunk async for chunk in response.body_iterator]
+
+    events = [
+        (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+        for lines in (chunk.strip().split("\n") for chunk in asyncio.run(collect()))
+    ]
+
+    assert [name for name, _ in events] == ["section", "section", "summary"]
+    assert [data["section"] for _, data in events[:2]] == ["technologies", "languages"]
+    assert events[0][1]["suggestions"][0]["updated"] == "Technologies"
+    assert events[2][1]["suggestionCount"] == 2
+    assert events[2][1]["timedOut"] == []
+
+
+def test_tailor_results_are_cached_by_inputs(monkeypatch, memory_tailor_cache):
+    from app import tailor
+
+    calls = []
+    timeout = {"section": None}
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            calls.append(message[0][1])
+            if timeout["section"] and f"Only focus on the {timeout['section']} section" in message[0][1]:
+                await asyncio.sleep(1)
+            suggestion = {"entryIdx": "0", "original": "", "updated": "u", "explanation": "x"}
+            return SimpleNamespace(text=json.dumps([suggestion]))
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"], technologies=["Docker"])
+    job = Job(id="1", title="x", url="https://example.com", description="desc")
+    evidence = {"languages": [{"chunkId": "a", "text": "Python daily"}]}
+
+    first = tailor._tailor_resume_core(resume, job, evidence)
+    assert len(calls) == 2 and len(memory_tailor_cache) == 1
+    assert tailor._tailor_resume_core(resume, job, evidence) == first
+    assert len(calls) == 2
+
+    # Different evidence, a bypass, or a timed-out section all reach the model.
+    tailor._tailor_resume_core(resume, job, {"languages": [{"chunkId": "b", "text": "Python daily"}]})
+    tailor._tailor_resume_core(resume, job, evidence, use_cache=False)
+    assert len(calls) == 6 and len(memory_tailor_cache) == 2
+
+    monkeypatch.setattr(tailor, "TAILOR_SECTION_TIMEOUT", 0.05)
+    timeout["section"] = "Technologies"
+    job = Job(id="1", title="x", url="https://example.com", description="other")
+    assert [s.section for s in tailor._tailor_resume_core(resume, job)] == ["languages"]
+    assert len(memory_tailor_cache) == 2
+
+
+def test_tailor_batch_shares_retrieval_and_caps_model_calls(monkeypatch):
+    from app import tailor
+
+    retrievals = []
+    in_flight = {"now": 0, "max": 0}
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            # Job "slow" finishes last even though it is submitted first.
+            await asyncio.sleep(0.1 if "slow" in message[1][1] else 0.01)
+            in_flight["now"] -= 1
+            suggestion = {"entryIdx": "0", "original": "", "updated": message[1][1], "explanation": "x"}
+            return SimpleNamespace(text=json.dumps([suggestion]))
+
+    def fake_retrieve(db, user_id, query_texts, top_k=8):
+        retrievals.append(len(query_texts))
+        return [[{"chunkId": "c", "score": 0.9, "text": "evidence"}] for _ in query_texts]
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    monkeypatch.setattr(tailor, "retrieve_relevant_chunks_batch", fake_retrieve)
+    monkeypatch.setattr(tailor, "TAILOR_MAX_CONCURRENCY", 3)
+    resume = Resume(languages=["Python"], technologies=["Docker"])
+    jobs = [
+        Job(id=str(i), title="x", url="https://example.com", description=description)
+        for i, description in enumerate(["slow", "fast one", "fast two"])
+    ]
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    async def collect():
+        response = await resume_api.tailorResumeBatch(
+            resume=resume, jobs=jobs, combined=False, cache=True, db=object(), current_user=user
+        )
+        return [chunk async for chunk in response.body_iterator]
+
+    events = [
+        (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+        for lines in (chunk.strip().split("\n") for chunk in asyncio.run(collect()))
+    ]
+
+    assert retrievals == [9]
+    assert in_flight["max"] == 3
+    assert [name for name, _ in events] == ["job", "job", "job", "summary"]
+    assert events[-2][1]["index"] == 0
+    assert {data["jobId"]: [s["updated"] for s in data["suggestions"]] for _, data in events[:3]} == {
+        "0": ["slow", "slow"],
+        "1": ["fast one", "fast one"],
+        "2": ["fast two", "fast two"],
+    }
+    assert events[-1][1] == {**events[-1][1], "jobs": 3, "failed": [], "suggestionCount": 6}
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(resume_api.tailorResumeBatch(resume=resume, jobs=[], db=object(), current_user=None))
+    assert exc.value.status_code == 400
+
+
+def test_prompt_budget_strips_boilerplate_and_drops_low_score_evidence(monkeypatch):
+    from app import prompt_budget
+
+    posting = "\n\n".join(
+        [
+            "We are hiring a backend engineer to build Python services on Kafka.",
+            "Benefits",
+            "- Medical, dental and vision\n- 401(k) match",
+            "Unlimited PTO and a home office stipend.",
+            "Requirements",
+            "Five years of Python and Postgres.",
+            "Acme is an equal opportunity employer and considers applicants without regard to race.",
+        ]
+    )
+    stripped = prompt_budget.strip_boilerplate(posting)
+    assert stripped == (
+        "We are hiring a backend engineer to build Python services on Kafka.\n\n"
+        "Requirements\n\nFive years of Python and Postgres."
+    )
+    # Requirements that merely mention boilerplate words are kept.
+    real = "\n\n".join(
+        [
+            "Privacy engineering sits at the core of our platform",
+            "You will design data retention and deletion services in Go.",
+            "You will build equity and compensation data pipelines in Python.",
+        ]
+    )
+    assert prompt_budget.strip_boilerplate(real) == real
+    assert prompt_budget.strip_boilerplate("Benefits:\n- 401(k)\n\n## Requirements\n\nGo") == "## Requirements\n\nGo"
+
+    chunks = [{"chunkId": str(i), "score": score, "text": "x" * 400} for i, score in enumerate([0.9, 0.2, 0.5])]
+    render = lambda kept: "".join(f"[{c['chunkId']}]" + c["text"] for c in kept)
+
+    roomy = prompt_budget.assemble("instructions", "resume", chunks, render, posting, budget=10_000)
+    assert roomy.evidence_dropped == 0 and roomy.truncated == []
+    # Short postings are sent as they are; long ones lose their boilerplate.
+    assert roomy.human == posting
+    long_posting = posting + "\n\n" + "Five years of Python and Postgres. " * 300
+    assert "401(k)" not in prompt_budget.assemble("i", "r", [], render, long_posting, budget=10_000).human
+    assert roomy.tokens["total"] == sum(v for k, v in roomy.tokens.items() if k != "total")
+
+    # Room for two chunks: the lowest-scoring one goes and order is kept.
+    budget = roomy.tokens["total"] - 50
+    tight = prompt_budget.assemble("instructions", "resume", chunks, render, posting, budget=budget)
+    assert tight.evidence_dropped == 1 and tight.truncated == []
+    assert tight.system.index("[0]") < tight.system.index("[2]") and "[1]" not in tight.system
+    assert tight.tokens["total"] <= budget
+
+    monkeypatch.setattr(prompt_budget, "MIN_JOB_TOKENS", 10)
+    starved = prompt_budget.assemble("instructions", "resume", chunks, render, "word " * 400, budget=50)
+    assert starved.evidence_dropped == 3 and starved.truncated == ["job"]
+    assert starved.human.endswith(prompt_budget.TRUNCATION_MARKER)
+    assert starved.tokens["total"] <= 50
+    assert starved == prompt_budget.assemble("instructions", "resume", chunks, render, "word " * 400, budget=50)
+
+
+def test_parse_prompts_run_concurrently_and_timeouts_become_null(monkeypatch):
+    from app import parse as parse_module
+
+    replies = {
+        "heading and education": (0.2, {"heading": {"name": "Jane Doe"}, "education": []}),
+        "work experience and projects": (5, {"experience": [], "projects": []}),
+        "programming languages and technologies": (0.1, {"languages": ["Python"], "technologies": ["N/A"]}),
+    }
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            delay, reply = next(v for k, v in replies.items() if f"extracts {k}" in message[0][1])
+            await asyncio.sleep(delay)
+            return SimpleNamespace(text=json.dumps(reply))
+
+    monkeypatch.setattr(parse_module, "PARSE_PROMPT_TIMEOUT", 0.3)
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        outputs = await parse_module._aparse_outputs(FakeModel(), "page text")
+        return outputs, asyncio.get_running_loop().time() - start
+
+    outputs, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.45
+    assert outputs["experience_projects"] is None
+    assert outputs["summary_skills"] == {"languages": ["Python"], "technologies": [None]}
+    resume = parse_module._build_resume(outputs)
+    assert resume.heading.name == "Jane Doe"
+    assert resume.experience is None and resume.languages == ["Python"]
+
+
+def _text_pdf(pages: list[str]) -> bytes:
+    """A minimal PDF with one line of Helvetica text per page."""
+    n = len(pages)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n)), n),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def test_pdf_text_extracts_every_page_in_order_up_to_the_cap(monkeypatch):
+    from app import pdf_text
+
+    pdf = _text_pdf([f"Page {i} text" for i in range(5)])
+
+    assert asyncio.run(pdf_text.extract_text(pdf)) == "\n\n".join(f"Page {i} text" for i in range(5))
+    assert asyncio.run(pdf_text.extract_text(_text_pdf(["Only page"]))) == "Only page"
+
+    monkeypatch.setattr(pdf_text, "PARSE_MAX_PAGES", 2)
+
+    async def pages():
+        return [item async for item in pdf_text.aiter_pages(pdf)]
+
+    assert asyncio.run(pages()) == [(0, "Page 0 text"), (1, "Page 1 text")]
+
+
+def test_parse_results_are_cached_by_pdf_content(monkeypatch):
+    from app import parse as parse_module
+    from app import parse_cache
+
+    store = {}
+    monkeypatch.setattr(parse_cache, "get", store.get)
+    monkeypatch.setattr(parse_cache, "put", store.__setitem__)
+    calls = []
+    replies = {
+        "heading and education": {"heading": {"name": "Jane Doe"}, "education": []},
+        "work experience and projects": {"experience": [], "projects": []},
+        "programming languages and technologies": {"languages": ["Python"], "technologies": []},
+    }
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            calls.append(message[1][1])
+            return SimpleNamespace(text=json.dumps(next(v for k, v in replies.items() if k in message[0][1])))
+
+    monkeypatch.setattr(parse_module, "get_model", lambda: FakeModel())
+    pdf = _text_pdf(["Jane Doe", "Python"])
+
+    first = asyncio.run(parse_module.aparse(pdf))
+    assert len(calls) == 3 and calls[0] == "Jane Doe\n\nPython"
+    assert asyncio.run(parse_module.aparse(pdf)) == first
+    assert len(calls) == 3
+
+    asyncio.run(parse_module.aparse(_text_pdf(["Jane Doe", "Go"])))
+    asyncio.run(parse_module.aparse(pdf, use_cache=False))
+    assert len(calls) == 9 and len(store) == 2
+
+    monkeypatch.setattr(parse_cache, "PROMPT_VERSION", "changed")
+    asyncio.run(parse_module.aparse(pdf))
+    assert len(calls) == 12 and len(store) == 3
+
+
+JAKES_LAYOUT_TEXT = """
+                                Jake Ryan
+    123-456-7890 | jake@su.edu | linkedin.com/in/jake | github.com/jake
+Education
+Southwestern University                                                   Georgetown, TX
+Bachelor of Arts in Computer Science, Minor in Business                  Aug. 2018 – May 2021
+Blinn College                                                                 Bryan, TX
+Associate's in Liberal Arts                                               Aug. 2014 – May 2018
+Experience
+Undergraduate Research Assistant                                       June 2020 – Present
+Texas A&M University                                                   College Station, TX
+    •   Developed a REST API using FastAPI and PostgreSQL to store data from learning
+        management systems
+    •   Explored ways to visualize GitHub collaboration in a classroom setting
+Information Technology Support Specialist                               Sep. 2018 – Present
+Southwestern University                                                      Georgetown, TX
+    •   Communicate with managers to set up campus computers used on campus
+Projects
+Gitlytics | Python, Flask, React, PostgreSQL, Docker                  June 2020 – Present
+    •   Developed a full-stack web application using Flask serving a REST API with React
+Simple Paintball | Spigot API, Java, Maven, TravisCI, Git               May 2018 – May 2020
+    •   Developed a Minecraft server plugin to entertain kids during free time
+Technical Skills
+Languages: Java, Python, C/C++, SQL (Postgres), JavaScript, HTML/CSS, R
+Frameworks: React, Node.js, Flask, JUnit, WordPress, Material-UI, FastAPI
+Developer Tools: Git, Docker, TravisCI, Google Cloud Platform, VS Code
+"""
+
+
+def test_fast_parse_reads_jakes_template_without_the_model(monkeypatch):
+    from app import fast_parse
+    from app import parse as parse_module
+    from app import parse_cache
+
+    fields = fast_parse.parse_layout(JAKES_LAYOUT_TEXT)
+    assert fields["heading"]["email"] == "jake@su.edu" and fields["heading"]["github"] == "github.com/jake"
+    assert [(e["school"], e["location"], e["start"], e["end"]) for e in fields["education"]] == [
+        ("Southwestern University", "Georgetown, TX", "Aug. 2018", "May 2021"),
+        ("Blinn College", "Bryan, TX", "Aug. 2014", "May 2018"),
+    ]
+    first_job = fields["experience"][0]
+    assert (first_job["title"], first_job["company"], first_job["end"]) == (
+        "Undergraduate Research Assistant",
+        "Texas A&M University",
+        "Present",
+    )
+    assert first_job["details"][0].endswith("from learning management systems")
+    assert fields["projects"][1]["tech"] == ["Spigot API", "Java", "Maven", "TravisCI", "Git"]
+    assert "SQL (Postgres)" in fields["languages"] and "Docker" in fields["technologies"]
+
+    async def fake_extract(_file):
+        return JAKES_LAYOUT_TEXT
+
+    def no_model():
+        raise AssertionError("the model should not be called")
+
+    monkeypatch.setattr(parse_cache, "get", lambda _key: None)
+    monkeypatch.setattr(parse_cache, "put", lambda _key, _value: None)
+    monkeypatch.setattr(parse_module, "extract_text", fake_extract)
+    monkeypatch.setattr(parse_module, "get_model", no_model)
+    resume = asyncio.run(parse_module.aparse(b"%PDF"))
+    assert resume.heading.name == "Jake Ryan"
+    assert len(resume.experience) == 2 and resume.projects[0].name == "Gitlytics"
+
+    # A section that breaks the template goes to the model; the rest does not.
+    broken = JAKES_LAYOUT_TEXT.replace("Texas A&M University                                                   ", "")
+    calls = []
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            calls.append(message[0][1])
+            return SimpleNamespace(text=json.dumps({"experience": [{"company": "LLM Co"}], "projects": []}))
+
+    async def fake_broken(_file):
+        return broken
+
+    monkeypatch.setattr(parse_module, "extract_text", fake_broken)
+    monkeypatch.setattr(parse_module, "get_model", lambda: FakeModel())
+    resume = asyncio.run(parse_module.aparse(b"%PDF"))
+    assert len(calls) == 1 and "work experience and projects" in calls[0]
+    assert [e.company for e in resume.experience] == ["LLM Co"]
+    assert resume.projects[0].name == "Gitlytics" and resume.education[1].school == "Blinn College"
+
+
+def test_fast_parse_leaves_sections_under_unknown_headers_to_the_model(monkeypatch):
+    from app import fast_parse
+    from app import parse as parse_module
+    from app import parse_cache
+
+    text = JAKES_LAYOUT_TEXT.replace("\nExperience\n", "\nWORK HISTORY\n")
+    fields = fast_parse.parse_layout(text)
+    assert "experience" not in fields
+    assert fields["projects"][0]["name"] == "Gitlytics" and fields["education"]
+
+    # Without unknown headers a missing section really is absent.
+    without = JAKES_LAYOUT_TEXT.split("\nExperience\n")[0] + "\nProjects\n" + JAKES_LAYOUT_TEXT.split("\nProjects\n")[1]
+    assert fast_parse.parse_layout(without)["experience"] is None
+
+    calls = []
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            calls.append(message[0][1])
+            return SimpleNamespace(text=json.dumps({"experience": [{"company": "Texas A&M"}], "projects": []}))
+
+    async def fake_extract(_file):
+        return text
+
+    monkeypatch.setattr(parse_cache, "get", lambda _key: None)
+    monkeypatch.setattr(parse_cache, "put", lambda _key, _value: None)
+    monkeypatch.setattr(parse_module, "extract_text", fake_extract)
+    monkeypatch.setattr(parse_module, "get_model", lambda: FakeModel())
+    resume = asyncio.run(parse_module.aparse(b"%PDF"))
+    assert len(calls) == 1 and "work experience and projects" in calls[0]
+    assert [e.company for e in resume.experience] == ["Texas A&M"]
+
+
+def test_tailor_logs_prompt_token_counts(monkeypatch, caplog):
+    from app import tailor
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            return SimpleNamespace(text="[]")
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"])
+    job = Job(id="job-7", title="x", url="https://example.com", description="desc")
+
+    with caplog.at_level("INFO", logger="app.tailor"):
+        asyncio.run(tailor.atailor_resume_with_rag(resume=resume, job=job, db=None, user_id=None))
+
+    assert any("job=job-7 section=languages tokens={" in r.getMessage() for r in caplog.records)
+
+
+def test_tailor_retrieval_runs_off_the_event_loop(monkeypatch):
+    import threading
+
+    from app import tailor
+
+    threads = []
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            return SimpleNamespace(text="[]")
+
+    def fake_retrieve(db, user_id, query_texts, top_k=8):
+        threads.append(threading.current_thread())
+        return [[] for _ in query_texts]
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    monkeypatch.setattr(tailor, "retrieve_relevant_chunks_batch", fake_retrieve)
+    resume = Resume(languages=["Python"])
+    job = Job(id="1", title="x", url="https://example.com", description="desc")
+
+    async def run():
+        await tailor.atailor_resume_with_rag(resume=resume, job=job, db=object(), user_id=uuid.uuid4())
+        sections = await tailor.stream_tailor_resume_with_rag(resume=resume, job=job, db=object(), user_id=uuid.uuid4())
+        return [item async for item in sections]
+
+    asyncio.run(run())
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_tailor_batch_logs_failed_jobs(monkeypatch, caplog):
+    from app import tailor
+
+    class FakeModel:
+        async def ainvoke(self, message):
+            if "broken" in message[1][1]:
+                raise RuntimeError("model exploded")
+            return SimpleNamespace(text="[]")
+
+    monkeypatch.setattr(tailor, "get_model", lambda: FakeModel())
+    resume = Resume(languages=["Python"])
+    jobs = [
+        Job(id=str(i), title="x", url="https://example.com", description=description)
+        for i, description in enumerate(["fine", "broken"])
+    ]
+
+    async def collect():
+        return [item async for item in tailor.aiter_tailored_jobs(resume, jobs, combined=True, use_cache=False)]
+
+    with caplog.at_level("ERROR", logger="app.tailor"):
+        results = dict(asyncio.run(collect()))
+
+    assert results[0] == [] and results[1] is None
+    failures = [r for r in caplog.records if "job=1" in r.getMessage()]
+    assert len(failures) == 1 and failures[0].exc_info is not None
+
+
+def test_result_caches_treat_database_errors_as_misses(monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from app import db_cache, parse_cache
+
+    class BrokenSession:
+        rolled_back = closed = False
+
+        def query(self, *args):
+            raise OperationalError("select", {}, Exception("db down"))
+
+        execute = query
+
+        def rollback(self):
+            BrokenSession.rolled_back = True
+
+        def close(self):
+            BrokenSession.closed = True
+
+    monkeypatch.setattr(db_cache, "SessionLocal", BrokenSession)
+    assert parse_cache.get("k") is None
+    parse_cache.put("k", {"languages": []})
+    assert parse_cache.evict() == 0
+    assert BrokenSession.rolled_back and BrokenSession.closed
+
+
+def test_ingestion_job_without_progress_is_reported_failed(monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app import ingest_queue
+
+    now = datetime.now(timezone.utc)
+    jobs = {
+        "stale": SimpleNamespace(updated_at=now - timedelta(hours=1), created_at=now - timedelta(hours=1)),
+        "queued": SimpleNamespace(updated_at=None, created_at=now - timedelta(hours=1)),
+        "fresh": SimpleNamespace(updated_at=now, created_at=now - timedelta(hours=1)),
+    }
+    commits = []
+
+    class FakeDb:
+        def __init__(self, job):
+            self.job = job
+
+        def query(self, _model):
+            return self
+
+        def filter(self, *_args):
+            return self
+
+        def first(self):
+            return self.job
+
+        def commit(self):
+            commits.append(self.job)
+
+    monkeypatch.setattr(ingest_queue, "INGEST_STALE_SECONDS", 600)
+    for name, job in jobs.items():
+        job.__dict__.update(
+            id=uuid.uuid4(),
+            status="running" if name != "queued" else "queued",
+            title="t",
+            document_id=None,
+            chunks_embedded=0,
+            chunks_total=0,
+            error=None,
+        )
+    statuses = {
+        name: ingest_queue.get_knowledge_ingest_job(FakeDb(job), uuid.uuid4(), job.id)["status"]
+        for name, job in jobs.items()
+    }
+
+    assert statuses == {"stale": "failed", "queued": "failed", "fresh": "running"}
+    assert jobs["stale"].error == ingest_queue.STALE_JOB_ERROR
+    assert commits == [jobs["stale"], jobs["queued"]]
@@ -0,0 +1,248 @@
+"""
+Retrieval benchmark against a local database.
+
+For each corpus size a synthetic user is created and filled with chunks
+(random unit vectors, or _fallback_embedding of the chunk text), then
+ingest, retrieval and document listing are timed through app.rag. The
+embeddings model is never called. Results are printed as JSON.
+
+    cd backend
+    python -m benchmarks.rag_bench --sizes 1000,10000,100000 > bench.json
+
+Synthetic users are deleted afterwards unless --keep is given.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app import embedding_cache, minhash, rag
+from app.database import SessionLocal
+from app.db.models import User, UserKnowledgeChunk, UserKnowledgeDocument
+from app.lexical import pack_postings, term_frequencies
+
+VOCABULARY = (
+    "python go rust java typescript kafka postgres redis kubernetes docker terraform aws gcp "
+    "fastapi django react graphql grpc latency throughput pipeline migration service api "
+    "cache queue index search ranking model training inference dashboard billing payments "
+    "reliability oncall incident scaled reduced improved designed built led mentored shipped"
+).split()
+
+INSERT_BATCH = 5000
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    return {
+        "count": int(ms.size),
+        "p50Ms": round(float(np.percentile(ms, 50)), 3),
+        "p95Ms": round(float(np.percentile(ms, 95)), 3),
+        "maxMs": round(float(ms.max()), 3),
+    }
+
+
+def _timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _sentence(rng: np.random.Generator, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY, size=words)) + "."
+
+
+def _vectors(rng: np.random.Generator, texts: list[str], kind: str, dims: int) -> np.ndarray:
+    if kind == "fallback":
+        return rag._embedding_matrix([rag._fallback_embedding(t) for t in texts])
+    return rag._normalize_rows(rng.standard_normal((len(texts), dims)).astype(np.float32))
+
+
+def _populate(db, user_id: uuid.UUID, n_chunks: int, chunks_per_doc: int, args, rng) -> None:
+    """Insert n_chunks synthetic chunks directly, bypassing chunking and embedding."""
+    docs: list[dict] = []
+    chunks: list[dict] = []
+
+    def flush() -> None:
+        if docs:
+            db.bulk_insert_mappings(UserKnowledgeDocument, docs)
+        if chunks:
+            db.bulk_insert_mappings(UserKnowledgeChunk, chunks)
+        db.commit()
+        docs.clear()
+        chunks.clear()
+
+    for start in range(0, n_chunks, chunks_per_doc):
+        doc_id = uuid.uuid4()
+        texts = [_sentence(rng, args.chunk_words) for _ in range(min(chunks_per_doc, n_chunks - start))]
+        docs.append(
+            {
+                "id": doc_id,
+                "user_id": user_id,
+                "title": f"Synthetic document {start // chunks_per_doc}",
+                "source_type": "note",
+                "content": "\n\n".join(texts),
+            }
+        )
+        matrix = _vectors(rng, texts, args.vectors, args.dims)
+        codes, scales = rag._quantize_rows(matrix)
+        for i, text in enumerate(texts):
+            counts, token_count = term_frequencies(text)
+            chunks.append(
+                {
+                    "id": uuid.uuid4(),
+                    "document_id": doc_id,
+                    "user_id": user_id,
+                    "chunk_index": i,
+                    "text": text,
+                    "text_hash": embedding_cache.text_hash(text),
+                    "metadata_json": {"title": docs[-1]["title"], "source_type": "note"},
+                    "embedding_vec": embedding_cache.pack_embedding(matrix[i]),
+                    "embedding_dim": matrix.shape[1],
+                    "embedding_dtype": rag.EMBEDDING_DTYPE,
+                    "embedding_model": "benchmark",
+                    "embedding_q8": codes[i].tobytes(),
+                    "embedding_scale": float(scales[i]),
+                    "minhash": minhash.to_bytes(minhash.signature(text)),
+                    "token_count": token_count,
+                    "term_postings": pack_postings(counts),
+                }
+            )
+        if len(chunks) >= INSERT_BATCH:
+            flush()
+    flush()
+    rag._bump_corpus_versions(db, [user_id])
+    db.commit()
+
+
+def _random_queries(args, rng):
+    """Stand-in for rag._embed_queries that returns random unit vectors."""
+
+    def embed(texts: list[str]) -> list[tuple[list[float], bool]]:
+        matrix = rag._normalize_rows(rng.standard_normal((len(texts), args.dims)).astype(np.float32))
+        return [(row.tolist(), True) for row in matrix]
+
+    return embed
+
+
+def _bench_size(n_chunks: int, args, rng) -> dict:
+    db = SessionLocal()
+    user = User(email=f"bench-{uuid.uuid4()}@example.invalid", password_hash="!")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    try:
+        start = time.perf_counter()
+        _populate(db, user_id, n_chunks, args.chunks_per_doc, args, rng)
+        populate_seconds = time.perf_counter() - start
+
+        ingest = [
+            _timed(
+                rag.ingest_user_knowledge,
+                db,
+                user_id,
+                f"Ingested {i}",
+                "\n\n".join(_sentence(rng, args.chunk_words) for _ in range(args.ingest_paragraphs)),
+            )
+            for i in range(args.ingest_docs)
+        ]
+
+        queries = [_sentence(rng, 12) for _ in range(args.queries)]
+        cold = []
+        for query in queries[: args.cold_queries]:
+            rag._invalidate_user_corpus(user_id)
+            cold.append(_timed(rag.retrieve_relevant_chunks, db, user_id, query, args.top_k))
+        rag._result_cache.clear()
+        warm = [_timed(rag.retrieve_relevant_chunks, db, user_id, q, args.top_k) for q in queries]
+        rag._result_cache.clear()
+        batch = [
+            _timed(rag.retrieve_relevant_chunks_batch, db, user_id, queries[i : i + 3], args.top_k)
+            for i in range(0, len(queries) - 2, 3)
+        ]
+        cached = [_timed(rag.retrieve_relevant_chunks, db, user_id, q, args.top_k) for q in queries]
+
+        pages = []
+        cursor = None
+        for _ in range(args.list_pages):
+            start = time.perf_counter()
+            page = rag.list_user_knowledge_documents(db, user_id, limit=args.page_size, cursor=cursor)
+            pages.append(time.perf_counter() - start)
+            cursor = page["nextCursor"]
+            if cursor is None:
+                break
+        doc_id = page["items"][0]["id"]
+        detail = [
+            _timed(rag.get_user_knowledge_document, db, user_id, doc_id, include_content=False)
+            for _ in range(args.queries)
+        ]
+
+        return {
+            "chunks": n_chunks,
+            "populateSeconds": round(populate_seconds, 2),
+            "ingest": _summary(ingest),
+            "retrieveCold": _summary(cold),
+            "retrieveWarm": _summary(warm),
+            "retrieveBatchOf3": _summary(batch),
+            "retrieveCached": _summary(cached),
+            "listPage": _summary(pages),
+            "getDocument": _summary(detail),
+            "peakRssMb": _peak_rss_mb(),
+        }
+    finally:
+        rag._invalidate_user_corpus(user_id)
+        if not args.keep:
+            db.rollback()
+            db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+            db.commit()
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated corpus sizes in chunks")
+    parser.add_argument("--vectors", choices=["random", "fallback"], default="random")
+    parser.add_argument("--dims", type=int, default=768, help="dimensions of random vectors")
+    parser.add_argument("--chunks-per-doc", type=int, default=20)
+    parser.add_argument("--chunk-words", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--cold-queries", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--ingest-docs", type=int, default=10)
+    parser.add_argument("--ingest-paragraphs", type=int, default=20)
+    parser.add_argument("--list-pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic users")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    # Keep the embeddings API out of the measurements: ingest uses the
+    # fallback embedding, and queries match the synthetic vectors' kind.
+    rag.get_embeddings_model = lambda: None
+    if args.vectors == "random":
+        rag._embed_queries = _random_queries(args, rng)
+
+    results = [_bench_size(int(size), args, rng) for size in args.sizes.split(",") if size.strip()]
+    config = dict(vars(args))
+    config.pop("keep")
+    config["shards"] = rag.embedding_shards.enabled()
+    config["rescoreCandidates"] = rag.RESCORE_CANDIDATES
+    json.dump({"config": config, "results": results}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
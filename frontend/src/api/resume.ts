@@ -1,3 +1,5 @@
+import type { KnowledgeDocumentPage, KnowledgeIngestJob } from "../types";
+
 export async function uploadResume(file: File) {
 	const form = new FormData();
 	form.append("file", file);
@@ -35,8 +37,9 @@ type CreateKnowledgeInput = {
 	sourceType?: string;
 };
 
-export async function getKnowledgeDocuments(token: string) {
-	const resp = await fetch("/resume/knowledge", {
+export async function getKnowledgeDocuments(token: string, cursor?: string | null) {
+	const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+	const resp = await fetch(`/resume/knowledge${query}`, {
 		method: "GET",
 		headers: {
 			"Content-Type": "application/json",
@@ -47,7 +50,7 @@ export async function getKnowledgeDocuments(token: string) {
 		const detail = await getErrorDetail(resp);
 		throw new Error(`Failed to load knowledge documents: ${resp.status} ${detail}`);
 	}
-	return resp.json();
+	return resp.json() as Promise<KnowledgeDocumentPage>;
 }
 
 export async function createKnowledgeDocument(input: CreateKnowledgeInput, token: string) {
@@ -63,7 +66,44 @@ export async function createKnowledgeDocument(input: CreateKnowledgeInput, token
 		const detail = await getErrorDetail(resp);
 		throw new Error(`Failed to create knowledge document: ${resp.status} ${detail}`);
 	}
-	return resp.json();
+	return resp.json() as Promise<KnowledgeIngestJob>;
+}
+
+export async function getKnowledgeIngestJob(jobId: string, token: string) {
+	const resp = await fetch(`/resume/knowledge/jobs/${encodeURIComponent(jobId)}`, {
+		method: "GET",
+		headers: {
+			"Content-Type": "application/json",
+			Authorization: `Bearer ${token}`,
+		},
+	});
+	if (!resp.ok) {
+		const detail = await getErrorDetail(resp);
+		throw new Error(`Failed to load ingestion status: ${resp.status} ${detail}`);
+	}
+	return resp.json() as Promise<KnowledgeIngestJob>;
+}
+
+export async function waitForKnowledgeIngestJob(
+	jobId: string,
+	token: string,
+	onProgress?: (job: KnowledgeIngestJob) => void,
+	intervalMs = 1000,
+	timeoutMs = 10 * 60 * 1000
+): Promise<KnowledgeIngestJob> {
+	const deadline = Date.now() + timeoutMs;
+	for (;;) {
+		const job = await getKnowledgeIngestJob(jobId, token);
+		onProgress?.(job);
+		if (job.status === "completed") return job;
+		if (job.status === "failed") {
+			throw new Error(job.error || "Failed to save context.");
+		}
+		if (Date.now() >= deadline) {
+			throw new Error("Saving context is taking too long. Please try again later.");
+		}
+		await new Promise((resolve) => setTimeout(resolve, intervalMs));
+	}
 }
 
 export async function getKnowledgeDocumentById(id: string, token: string) {
@@ -101,6 +141,8 @@ export default {
 	uploadResume,
 	getKnowledgeDocuments,
 	createKnowledgeDocument,
+	getKnowledgeIngestJob,
+	waitForKnowledgeIngestJob,
 	getKnowledgeDocumentById,
 	deleteKnowledgeDocument,
 };
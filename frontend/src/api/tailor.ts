@@ -35,4 +35,69 @@ export async function getSuggestions(resume: Resume, job: Job, token?: string |
         console.error("Error fetching suggestions:", error);
         throw error;
     }
-}
\ No newline at end of file
+}
+
+export type TailorSectionEvent = {
+    section: string;
+    suggestions: Suggestion[];
+    timedOut: boolean;
+};
+
+export type TailorSummaryEvent = {
+    sections: Record<string, number>;
+    timedOut: string[];
+    suggestionCount: number;
+    elapsedMs: number;
+};
+
+// Streams /resume/tailor/stream (server-sent events over a POST, so EventSource
+// cannot be used). onSection fires as soon as each section is ready.
+export async function streamSuggestions(
+    resume: Resume,
+    job: Job,
+    onSection: (event: TailorSectionEvent) => void,
+    token?: string | null,
+): Promise<TailorSummaryEvent | null> {
+    const headers: Record<string, string> = { "Content-Type": "application/json" };
+    if (token) {
+        headers.Authorization = `Bearer ${token}`;
+    }
+    const resp = await fetch("/resume/tailor/stream", {
+        method: "POST",
+        headers,
+        body: JSON.stringify({ resume, job }),
+    });
+    if (!resp.ok || !resp.body) {
+        const detail = await getErrorDetail(resp);
+        throw new Error(`Failed to get suggestions: ${resp.status} ${detail}`);
+    }
+
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let summary: TailorSummaryEvent | null = null;
+    for (;;) {
+        const { value, done } = await reader.read();
+        buffer += decoder.decode(value, { stream: !done });
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+
+            let event = "message";
+            let data = "";
+            for (const line of block.split("\n")) {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            }
+            if (!data) continue;
+            const payload = JSON.parse(data);
+            if (event === "section") onSection(payload as TailorSectionEvent);
+            else if (event === "summary") summary = payload as TailorSummaryEvent;
+            else if (event === "error") throw new Error(`Failed to get suggestions: ${payload.detail}`);
+        }
+        if (done) break;
+    }
+    return summary;
+}
@@ -4,6 +4,7 @@ import {
   deleteKnowledgeDocument,
   getKnowledgeDocumentById,
   getKnowledgeDocuments,
+  waitForKnowledgeIngestJob,
 } from "../api/resume";
 import type { KnowledgeDocument, KnowledgeDocumentDetail } from "../types";
 
@@ -18,6 +19,7 @@ function getErrorMessage(err: unknown, fallback: string) {
 
 export default function KnowledgePanel({ token }: Props) {
   const [docs, setDocs] = useState<KnowledgeDocument[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [title, setTitle] = useState("");
   const [content, setContent] = useState("");
   const [loading, setLoading] = useState(false);
@@ -30,13 +32,15 @@ export default function KnowledgePanel({ token }: Props) {
   const [status, setStatus] = useState<string | null>(null);
   const openRequestSeq = useRef(0);
 
-  const loadDocuments = useCallback(async () => {
+  const loadDocuments = useCallback(async (cursor?: string | null) => {
     if (!token) return;
     setLoading(true);
     setError(null);
     try {
-      const data = (await getKnowledgeDocuments(token)) as KnowledgeDocument[];
-      setDocs(Array.isArray(data) ? data : []);
+      const page = await getKnowledgeDocuments(token, cursor);
+      const items = Array.isArray(page?.items) ? page.items : [];
+      setDocs((prev) => (cursor ? [...prev, ...items] : items));
+      setNextCursor(page?.nextCursor ?? null);
     } catch (err: unknown) {
       setError(getErrorMessage(err, "Failed to load saved context."));
     } finally {
@@ -104,7 +108,7 @@ export default function KnowledgePanel({ token }: Props) {
     setError(null);
     setStatus(null);
     try {
-      await createKnowledgeDocument(
+      const job = await createKnowledgeDocument(
         {
           title: title.trim(),
           content: content.trim(),
@@ -112,6 +116,11 @@ export default function KnowledgePanel({ token }: Props) {
         },
         token
       );
+      await waitForKnowledgeIngestJob(job.jobId, token, (progress) => {
+        if (progress.chunksTotal > 0) {
+          setStatus(`Saving context… ${progress.chunksEmbedded}/${progress.chunksTotal} sections`);
+        }
+      });
       setTitle("");
       setContent("");
       setStatus("Context saved.");
@@ -194,6 +203,11 @@ export default function KnowledgePanel({ token }: Props) {
                 </div>
               ))
             )}
+            {nextCursor && (
+              <button type="button" onClick={() => loadDocuments(nextCursor)} disabled={loading}>
+                {loading ? "Loading..." : "Load more"}
+              </button>
+            )}
           </div>
         </>
       )}
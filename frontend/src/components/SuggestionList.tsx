@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import SuggestionCard from "./SuggestionCard";
-import { getSuggestions } from "../api/tailor";
+import { streamSuggestions } from "../api/tailor";
 import type { Suggestion, Resume, Job } from "../types";
 import "../App.css";
 
@@ -41,18 +41,21 @@ export default function SuggestionList({ resume, job, token, onResumeUpdate, onC
 
         setLoading(true);
         setError(null);
+        // reset with new list
+        setSuggestions([]);
+        setAppliedIds(new Set());
+        setRejectedIds(new Set());
         try {
-            const fetched = await getSuggestions(currentResume, job, token);
-            setSuggestions(
-                fetched.map((suggestion, index) => ({
-                    id: `${suggestion.section}-${suggestion.entryIdx ?? "none"}-${suggestion.bulletIdx ?? "none"}-${index}`,
-                    suggestion,
-                }))
-            );
-
-            // reset with new list
-            setAppliedIds(new Set());
-            setRejectedIds(new Set());
+            // sections arrive one at a time; show each as soon as it is ready
+            await streamSuggestions(currentResume, job, ({ section, suggestions: fetched }) => {
+                setSuggestions((prev) => [
+                    ...prev,
+                    ...fetched.map((suggestion, index) => ({
+                        id: `${section}-${suggestion.entryIdx ?? "none"}-${suggestion.bulletIdx ?? "none"}-${index}`,
+                        suggestion,
+                    })),
+                ]);
+            }, token);
         } catch (err: any) {
             setError(err?.message || "Failed to fetch suggestions");
             console.error("Error fetching suggestions:", err);
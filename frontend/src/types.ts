@@ -64,8 +64,25 @@ export interface KnowledgeDocument {
   title: string;
   sourceType: string;
   chunkCount: number;
+  createdAt?: string | null;
+}
+
+export interface KnowledgeDocumentPage {
+  items: KnowledgeDocument[];
+  nextCursor: string | null;
 }
 
 export interface KnowledgeDocumentDetail extends KnowledgeDocument {
   content: string;
+  contentLength?: number;
+}
+
+export interface KnowledgeIngestJob {
+  jobId: string;
+  status: "queued" | "running" | "completed" | "failed";
+  title: string;
+  documentId: string | null;
+  chunksEmbedded: number;
+  chunksTotal: number;
+  error: string | null;
 }